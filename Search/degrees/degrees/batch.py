@@ -0,0 +1,176 @@
+"""
+Batch degrees of separation queries.
+
+Reads (source, target) person ID pairs, one comma-separated pair per line,
+from a file or stdin (or pairs of names with --names, each resolved to the
+closest matching name in the name index) and writes one CSV row per pair as results come in:
+
+    source,target,degrees,path
+
+where path lists movie_id:person_id steps separated by ";" and degrees is
+empty if the people are not connected (or "unknown" for an unknown ID).
+Queries are spread over worker processes that memory-map the same graph
+snapshot, so the graph is loaded once per machine rather than pickled to
+every worker. Throughput and latency percentiles are reported on stderr.
+
+Usage: python batch.py directory [pairs.csv] [--workers N] [--output results.csv]
+                       [--source-cache-mb MB] [--names]
+"""
+
+import argparse
+import csv
+import itertools
+import os
+import sys
+import time
+
+import degrees
+from snapshot import snapshot_path
+
+# Pairs handed to the worker pool at a time, which bounds memory use
+BLOCK_SIZE = 10000
+
+# Pairs sent to a worker per task
+CHUNK_SIZE = 64
+
+# Whether pairs hold names rather than person IDs, set by init_worker
+resolve_names = False
+
+
+def read_pairs(f):
+    """
+    Yields (source, target) pairs from lines of comma-separated person IDs,
+    skipping blank lines and a "source,target" header.
+    """
+    for row in csv.reader(f):
+        if len(row) < 2 or row[:2] == ["source", "target"]:
+            continue
+        yield row[0].strip(), row[1].strip()
+
+
+def init_worker(directory, cache_bytes=0, names=False, processes=None):
+    """
+    Loads the graph in this process. Pool workers pass `processes` of 1:
+    they are daemonic and may not start pools of their own, which they
+    would if the snapshot is missing and the CSV files must be parsed.
+    """
+    global resolve_names
+    resolve_names = names
+    degrees.load_data(directory, backend="csr", processes=processes)
+    if cache_bytes:
+        degrees.enable_source_cache(cache_bytes)
+
+
+def query(pair):
+    """
+    Returns (source, target, path, seconds) for one pair, where path is
+    None if the people are not connected and "unknown" for an unknown ID.
+    """
+    source, target = pair
+    start = time.perf_counter()
+    try:
+        if resolve_names:
+            source, target = (resolve_name(name) for name in pair)
+        path = degrees.shortest_path(source, target)
+    except KeyError:
+        path = "unknown"
+    return source, target, path, time.perf_counter() - start
+
+
+def resolve_name(name):
+    """
+    Returns the ID of the person whose name is closest to `name`.
+    """
+    matches = degrees.match_name(name, limit=1)
+    if not matches:
+        raise KeyError(name)
+    return matches[0][0]
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run(directory, pairs, output, workers, cache_bytes=0, names=False):
+    """
+    Answers every pair and writes the results to `output`. Returns the
+    per-query latencies in seconds.
+    """
+    writer = csv.writer(output)
+    writer.writerow(["source", "target", "degrees", "path"])
+    latencies = []
+
+    # Build the snapshot once so that every worker just maps it
+    init_worker(directory, cache_bytes, names)
+
+    pool = None
+    if workers > 1:
+        from multiprocessing import Pool
+        if not os.path.isfile(snapshot_path(directory)):
+            print(f"warning: no snapshot in {directory}, every worker parses the CSV files", file=sys.stderr)
+        pool = Pool(workers, initializer=init_worker, initargs=(directory, cache_bytes, names, 1))
+    try:
+        while True:
+            block = list(itertools.islice(pairs, BLOCK_SIZE))
+            if not block:
+                break
+            results = pool.imap(query, block, CHUNK_SIZE) if pool else map(query, block)
+            for source, target, path, seconds in results:
+                latencies.append(seconds)
+                if path is None:
+                    writer.writerow([source, target, "", ""])
+                elif path == "unknown":
+                    writer.writerow([source, target, "unknown", ""])
+                else:
+                    steps = ";".join(f"{movie}:{person}" for movie, person in path)
+                    writer.writerow([source, target, len(path), steps])
+            output.flush()
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer degrees of separation queries in bulk.")
+    parser.add_argument("directory")
+    parser.add_argument("pairs", nargs="?", default="-",
+                        help="CSV file of source,target person IDs (default: stdin)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output", default="-", help="results CSV (default: stdout)")
+    parser.add_argument("--source-cache-mb", type=float, default=0,
+                        help="per-worker memory for cached BFS trees of repeated sources")
+    parser.add_argument("--names", action="store_true",
+                        help="pairs hold names, resolved by fuzzy matching, instead of person IDs")
+    args = parser.parse_args()
+
+    source = sys.stdin if args.pairs == "-" else open(args.pairs, encoding="utf-8", newline="")
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    try:
+        start = time.perf_counter()
+        latencies = run(args.directory, read_pairs(source), output, args.workers,
+                        int(args.source_cache_mb * 1024 * 1024), args.names)
+        elapsed = time.perf_counter() - start
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+
+    latencies.sort()
+    rate = len(latencies) / elapsed if elapsed else 0.0
+    print(f"{len(latencies)} queries in {elapsed:.2f}s ({rate:.1f} queries/s)", file=sys.stderr)
+    print("latency ms: " + ", ".join(
+        f"p{round(fraction * 100)} {percentile(latencies, fraction) * 1000:.3f}"
+        for fraction in (0.5, 0.9, 0.99)
+    ) + f", max {percentile(latencies, 1) * 1000:.3f}", file=sys.stderr)
+    if args.workers <= 1 and degrees.source_cache is not None:
+        stats = degrees.source_cache.stats()
+        print(f"source cache: {stats['hits']} hits, {stats['misses']} misses", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Benchmarks for degrees.
+
+Times load_data, neighbors_for_person and shortest_path for each backend
+and search strategy on fixed query sets: pairs of connected people and
+pairs of people who are not connected. The query sets only depend on the
+data and the seed, so runs on the same data set are comparable. Each
+backend runs in a process of its own so that its peak resident memory
+can be recorded.
+
+Results are written as JSON; with --baseline, the mean times are compared
+against an earlier run to spot regressions. Use generate.py for data
+sets larger than small.
+
+Usage: python benchmark.py directory [--backends dict csr] [--strategies ...]
+                           [--queries N] [--seed S] [--output results.json]
+                           [--baseline results.json]
+"""
+
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+
+import degrees
+from batch import percentile
+from util import SearchStats
+
+STRATEGIES = ("bidirectional", "bipartite", "bfs", "astar")
+
+# Strategies timed unless --strategies is given; "bfs" is very slow on
+# large data sets with the dict backend
+DEFAULT_STRATEGIES = ("bidirectional", "bipartite", "astar")
+
+# Random draws allowed per wanted query pair before giving up
+ATTEMPTS = 100
+
+
+def peak_rss():
+    """
+    Returns the peak resident memory of this process in bytes, or None
+    where the resource module is unavailable.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def query_sets(person_ids, count, seed):
+    """
+    Returns {"connected": pairs, "unreachable": pairs} with up to `count`
+    (source, target) pairs of distinct people in the same component and in
+    different components, drawn from the sorted `person_ids` with `seed`.
+    """
+    rng = random.Random(seed)
+    sets = {"connected": [], "unreachable": []}
+    for name, wanted in (("connected", True), ("unreachable", False)):
+        for _ in range(count * ATTEMPTS):
+            if len(sets[name]) == count:
+                break
+            source, target = rng.choice(person_ids), rng.choice(person_ids)
+            if source != target and (degrees.component(source) == degrees.component(target)) == wanted:
+                sets[name].append((source, target))
+    return sets
+
+
+def timings(seconds):
+    """
+    Summarizes a list of per-call times in seconds.
+    """
+    ordered = sorted(seconds)
+    total = sum(ordered)
+    return {
+        "count": len(ordered),
+        "total": total,
+        "mean": total / len(ordered) if ordered else 0.0,
+        "p50": percentile(ordered, 0.5),
+        "p99": percentile(ordered, 0.99),
+        "max": percentile(ordered, 1)
+    }
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def run(directory, backend, strategies, count, seed, cache=True):
+    """
+    Benchmarks one backend in this process. Returns a dict of phase
+    timings, the answers found (to compare backends), the total search
+    effort for each query set and peak memory.
+    """
+    result = {"backend": backend, "phases": {}, "answers": {}, "searches": {}, "skipped": []}
+    phases = result["phases"]
+
+    _, seconds = timed(degrees.load_data, directory, backend=backend, cache=cache)
+    phases["load_data"] = timings([seconds])
+    if backend == "csr" and cache:
+
+        # The first load may have had to build the snapshot
+        _, seconds = timed(degrees.load_data, directory, backend=backend, cache=cache)
+        phases["load_data (snapshot)"] = timings([seconds])
+    result["rss_after_load"] = peak_rss()
+
+    person_ids = sorted(degrees.graph.person_ids if degrees.graph is not None else degrees.people)
+    sets = query_sets(person_ids, count, seed)
+
+    people = [source for source, _ in sets["connected"]]
+    phases["neighbors_for_person"] = timings([
+        timed(degrees.neighbors_for_person, person_id)[1] for person_id in people
+    ])
+
+    for strategy in strategies:
+        if strategy == "astar":
+            if degrees.graph is None:
+                result["skipped"].append(strategy)
+                continue
+            _, seconds = timed(degrees.load_landmarks, directory)
+            phases["load_landmarks"] = timings([seconds])
+        for name, pairs in sets.items():
+            seconds, lengths = [], []
+            for source, target in pairs:
+                path, elapsed = timed(degrees.shortest_path, source, target, strategy)
+                seconds.append(elapsed)
+                lengths.append(None if path is None else len(path))
+            phases[f"shortest_path {strategy} {name}"] = timings(seconds)
+            result["answers"][f"{strategy} {name}"] = lengths
+
+            # Search effort, measured in a separate pass so that it does
+            # not weigh on the timings
+            stats = SearchStats()
+            for source, target in pairs:
+                degrees.shortest_path(source, target, strategy, stats=stats)
+            result["searches"][f"{strategy} {name}"] = stats.as_dict()
+
+    result["peak_rss"] = peak_rss()
+    return result
+
+
+def compare(results, baseline):
+    """
+    Yields (backend, phase, mean, baseline mean) for phases timed in both
+    runs.
+    """
+    earlier = {
+        (entry["backend"], phase): timing["mean"]
+        for entry in baseline["results"] for phase, timing in entry["phases"].items()
+    }
+    for entry in results:
+        for phase, timing in entry["phases"].items():
+            if (entry["backend"], phase) in earlier:
+                yield entry["backend"], phase, timing["mean"], earlier[entry["backend"], phase]
+
+
+def report(results, baseline=None, out=sys.stderr):
+    for entry in results:
+        rss = entry["peak_rss"]
+        print(f"{entry['backend']}: peak RSS "
+              f"{'unknown' if rss is None else f'{rss / 1024 / 1024:.1f} MiB'}", file=out)
+        for phase, timing in entry["phases"].items():
+            print(f"  {phase:<40} n={timing['count']:<5} mean {timing['mean'] * 1000:9.3f} ms"
+                  f"  p99 {timing['p99'] * 1000:9.3f} ms", file=out)
+        for key, counters in entry["searches"].items():
+            print(f"  search {key:<33} expanded {counters['expanded']:<9} "
+                  f"generated {counters['generated']:<9} peak frontier {counters['peak_frontier']}", file=out)
+        for strategy in entry["skipped"]:
+            print(f"  {strategy} skipped: not supported by this backend", file=out)
+
+    # Every backend and strategy must find the same degrees of separation
+    expected = {}
+    for entry in results:
+        for key, lengths in entry["answers"].items():
+            name = key.split()[-1]
+            if expected.setdefault(name, lengths) != lengths:
+                print(f"warning: {entry['backend']} {key} disagrees with earlier answers", file=out)
+
+    if baseline is not None:
+        print("compared to baseline:", file=out)
+        for backend, phase, mean, earlier in compare(results, baseline):
+            change = (mean / earlier - 1) * 100 if earlier else 0.0
+            print(f"  {backend} {phase:<40} {change:+7.1f}%", file=out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark degrees backends and search strategies.")
+    parser.add_argument("directory")
+    parser.add_argument("--backends", nargs="+", choices=["dict", "csr"], default=["dict", "csr"])
+    parser.add_argument("--strategies", nargs="+", choices=STRATEGIES, default=list(DEFAULT_STRATEGIES))
+    parser.add_argument("--queries", type=int, default=200, help="pairs in each query set")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-cache", dest="cache", action="store_false",
+                        help="neither read nor write snapshots with the csr backend")
+    parser.add_argument("--output", default="-", help="JSON results (default: stdout)")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare with")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = run(args.directory, args.backends[0], args.strategies, args.queries, args.seed, args.cache)
+        json.dump(result, sys.stdout)
+        return
+
+    # One process per backend, so that peak memory is measured separately
+    results = []
+    for backend in args.backends:
+        command = [
+            sys.executable, __file__, args.directory, "--child",
+            "--backends", backend, "--strategies", *args.strategies,
+            "--queries", str(args.queries), "--seed", str(args.seed)
+        ]
+        if not args.cache:
+            command.append("--no-cache")
+        child = subprocess.run(command, stdout=subprocess.PIPE, check=True)
+        results.append(json.loads(child.stdout))
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    report(results, baseline)
+
+    output = {
+        "directory": args.directory,
+        "queries": args.queries,
+        "seed": args.seed,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results
+    }
+    if args.output == "-":
+        json.dump(output, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(output, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Cache of complete breadth-first search trees for the degrees graph.
+
+Workloads that ask for paths from the same popular people over and over
+can keep the whole BFS tree of each recent source. A later query from a
+cached source is then answered by following parent links from the target,
+in time proportional to the path length.
+"""
+
+from array import array
+from collections import OrderedDict
+
+
+class TreeCache():
+    """
+    Least-recently-used cache of BFS trees keyed by source person index,
+    holding at most `max_bytes` of trees.
+    """
+
+    def __init__(self, graph, max_bytes):
+        self.graph = graph
+        self.max_bytes = max_bytes
+        self.trees = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, source):
+        return source in self.trees
+
+    def __len__(self):
+        return len(self.trees)
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "trees": len(self.trees),
+            "bytes": self.bytes
+        }
+
+    def clear(self):
+        self.trees.clear()
+        self.bytes = 0
+
+    def discard(self, source):
+        tree = self.trees.pop(source, None)
+        if tree is not None:
+            self.bytes -= _size(tree)
+
+    def discard_components(self, labels):
+        """
+        Drops the trees of sources in the given components, for example
+        after credits were added to them.
+        """
+        for source in list(self.trees):
+            if self.graph.component(source) in labels:
+                self.discard(source)
+
+    def tree(self, source):
+        """
+        Returns the (parent_movies, parent_people) arrays of the BFS tree
+        rooted at `source`, building and caching it if needed.
+        """
+        tree = self.trees.get(source)
+        if tree is not None:
+            self.hits += 1
+            self.trees.move_to_end(source)
+            return tree
+
+        self.misses += 1
+        tree = build_tree(self.graph, source)
+        size = _size(tree)
+        if size <= self.max_bytes:
+            while self.trees and self.bytes + size > self.max_bytes:
+                _, evicted = self.trees.popitem(last=False)
+                self.bytes -= _size(evicted)
+                self.evictions += 1
+            self.trees[source] = tree
+            self.bytes += size
+        return tree
+
+    def path(self, source, target):
+        """
+        Returns the shortest list of (movie, person) index pairs from the
+        source to the target, or None if they are not connected.
+        """
+        if not self.graph.connected(source, target):
+            return None
+        parent_movies, parent_people = self.tree(source)
+        if target >= len(parent_people) or parent_people[target] == -1:
+            return None
+        path = []
+        person = target
+        while person != source:
+            path.append((parent_movies[person], person))
+            person = parent_people[person]
+        path.reverse()
+        return path
+
+
+def _size(tree):
+    return sum(part.itemsize * len(part) for part in tree)
+
+
+def build_tree(graph, source):
+    """
+    Runs a full breadth-first search from `source`. Returns arrays giving,
+    for each person, the movie and the person they were first reached
+    through, or -1 for people who are unreachable.
+    """
+    parent_movies = array("i", [-1]) * graph.person_count
+    parent_people = array("i", [-1]) * graph.person_count
+    seen_movies = bytearray(graph.movie_count)
+    parent_people[source] = source
+
+    frontier = [source]
+    while frontier:
+        layer = []
+        for person in frontier:
+            for movie in graph.movies_of(person):
+                if seen_movies[movie]:
+                    continue
+                seen_movies[movie] = 1
+                for other in graph.stars_of(movie):
+                    if parent_people[other] == -1:
+                        parent_people[other] = person
+                        parent_movies[other] = movie
+                        layer.append(other)
+        frontier = layer
+    return parent_movies, parent_people
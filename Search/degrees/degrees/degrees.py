@@ -1,7 +1,17 @@
+import argparse
 import csv
 import sys
 
-from util import Node, StackFrontier, QueueFrontier
+from contextlib import nullcontext
+
+from cache import TreeCache
+from delta import COMPACT_ROWS, append_journal, journal_size, read_journal
+from graph import find_label
+from ingest import load_graph
+from landmarks import LANDMARKS, LandmarkIndex
+from names import NameIndex
+from snapshot import read_snapshot, write_snapshot
+from util import Node, QueueFrontier, search
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,11 +22,86 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Maps person_ids to the index of their connected component
+components = {}
+
+# Number of people in each connected component
+component_sizes = []
+
+# Maps component labels merged by apply_delta to the label they joined
+merged_components = {}
+
+# Compact graph used instead of the dicts above by the "csr" backend
+graph = None
+
+# Optional cache of BFS trees for recent sources, see enable_source_cache
+source_cache = None
+
+# Landmark distance index for bounds and A* search, see load_landmarks
+landmarks = None
+
+# Prefix and fuzzy index of people by name
+name_index = None
+
+# Search filters compiled by movie_filter and person_filter
+filters = {}
+
 
-def load_data(directory):
+def load_data(directory, backend="dict", cache=True, processes=None, compact=False):
     """
     Load data from CSV files into memory.
+
+    The "dict" backend fills `names`, `people` and `movies`; the "csr"
+    backend builds the integer-indexed `graph` instead. Both build the
+    `name_index`. With `cache`, the "csr" backend memory-maps a snapshot
+    of the graph and name index saved by an earlier run, and saves them
+    when there are none for the current CSV files.
+    When the graph has to be built, the CSV files are parsed by
+    `processes` worker processes (default: one per CPU).
+
+    Rows added with apply_delta and recorded in the journal of
+    `directory` are applied on top of the CSV data. The "csr" backend
+    replays only the rows the snapshot does not include yet; when there
+    are more than delta.COMPACT_ROWS of them, or with `compact`, it
+    rebuilds the snapshot and name index with the whole journal folded in.
     """
+    global graph, source_cache, landmarks, name_index
+    source_cache = None
+    landmarks = None
+    filters.clear()
+    if backend == "csr":
+        graph, folded = read_snapshot(directory) if cache else (None, 0)
+        end = journal_size(directory)
+        delta = read_journal(directory, folded, end) if graph is not None and folded <= end else None
+        if delta is None or compact or sum(map(len, delta)) > COMPACT_ROWS:
+            graph = load_graph(directory, processes, read_journal(directory, 0, end))
+            folded, delta = end, ((), (), ())
+            if cache:
+                try:
+                    write_snapshot(directory, graph, folded)
+                except OSError:
+                    pass
+
+        tables = (graph.person_names, graph.person_ids, graph.person_births)
+        name_index = NameIndex.load(directory, *tables, folded) if cache else None
+        if name_index is None:
+            name_index = NameIndex.build(*tables)
+            if cache:
+                try:
+                    name_index.save(directory, folded)
+                except OSError:
+                    pass
+        apply_delta(*delta)
+        return
+    elif backend != "dict":
+        raise ValueError(f"unknown backend: {backend}")
+    graph = None
+
+    # Rows of an earlier load would hide those of the journal as known
+    names.clear()
+    people.clear()
+    movies.clear()
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -51,15 +136,62 @@ def load_data(directory):
             except KeyError:
                 pass
 
+    # Journal rows go in before the name index is built, so that lookups
+    # do not scan them one by one
+    label_components()
+    name_index = None
+    apply_delta(*read_journal(directory))
+    name_index = NameIndex.from_people(people)
+
+
+def label_components():
+    """
+    Labels every person in `people` with their connected component.
+    """
+    components.clear()
+    component_sizes.clear()
+    merged_components.clear()
+    for root in people:
+        if root in components:
+            continue
+        label = len(component_sizes)
+        components[root] = label
+        size = 1
+        frontier = [root]
+        while frontier:
+            person_id = frontier.pop()
+            for movie_id in people[person_id]["movies"]:
+                for other in movies[movie_id]["stars"]:
+                    if other not in components:
+                        components[other] = label
+                        size += 1
+                        frontier.append(other)
+        component_sizes.append(size)
+
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(description="Find degrees of separation between two people.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--backend", choices=["dict", "csr"], default="csr",
+                        help="in-memory representation of the data (default: csr)")
+    parser.add_argument("--no-cache", dest="cache", action="store_false",
+                        help="neither read nor write a snapshot of the csr graph")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="worker processes for parsing the CSV files (default: one per CPU)")
+    parser.add_argument("--strategy", choices=["bidirectional", "bipartite", "bfs", "astar"],
+                        default="bidirectional",
+                        help="search strategy; astar uses the landmark index (csr backend only)")
+    parser.add_argument("--min-year", type=int, default=None,
+                        help="only follow movies released in or after this year (csr backend only)")
+    parser.add_argument("--max-year", type=int, default=None,
+                        help="only follow movies released in or before this year (csr backend only)")
+    args = parser.parse_args()
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(args.directory, backend=args.backend, cache=args.cache, processes=args.processes)
+    if args.strategy == "astar":
+        load_landmarks(args.directory)
     print("Data loaded.")
 
     source = person_id_for_name(input("Name: "))
@@ -69,7 +201,10 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    movies_allowed = None
+    if args.min_year is not None or args.max_year is not None:
+        movies_allowed = movie_filter(min_year=args.min_year, max_year=args.max_year)
+    path = shortest_path(source, target, strategy=args.strategy, movies_allowed=movies_allowed)
 
     if path is None:
         print("Not connected.")
@@ -78,66 +213,487 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = person_name(path[i][1])
+            person2 = person_name(path[i + 1][1])
+            movie = movie_title(path[i + 1][0])
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, strategy="bidirectional", movies_allowed=None, people_allowed=None,
+                  stats=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    `strategy` is either "bidirectional" (search from both ends at once),
+    "bipartite" (breadth-first search from the source that expands each
+    movie only once), "bfs" (plain breadth-first search over co-star
+    pairs) or, with the "csr" backend and a landmark index loaded, "astar"
+    (A* search guided by landmark distances).
+
+    With the "csr" backend, `movies_allowed` and `people_allowed` restrict
+    the path to the movies and people let through by filters from
+    movie_filter and person_filter.
+
+    Pass a util.SearchStats as `stats` to record the nodes generated and
+    expanded, peak sizes and the time spent in each phase of the query.
+
     If no possible path, returns None.
     """
+    if graph is not None:
+        return _graph_path(source, target, strategy, movies_allowed, people_allowed, stats)
+    if movies_allowed is not None or people_allowed is not None:
+        raise ValueError("search filters need the csr backend")
+
+    # People in different components are never connected
+    if component(source) != component(target):
+        return None
+    if strategy == "bidirectional":
+        search_path = bidirectional_path
+    elif strategy == "bipartite":
+        search_path = bipartite_path
+    elif strategy == "bfs":
+        search_path = bfs_path
+    else:
+        raise ValueError(f"unknown search strategy: {strategy}")
+    with _phase(stats, "search"):
+        return search_path(source, target, stats)
+
+
+def bfs_path(source, target, stats=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs that connect
+    the source to the target, by breadth-first search over co-star pairs.
+
+    If no possible path, returns None.
+    """
+    node = search(
+        source,
+        lambda person_id: person_id == target,
+        lambda person_id: (
+            (movie_id, star_id) for movie_id in people[person_id]["movies"]
+            for star_id in movies[movie_id]["stars"]
+        ),
+        "bfs",
+        stats=stats
+    )
+    return None if node is None else _path_to(node)
 
-    root = Node(state=source, parent=None, action=None)
-    frontier = QueueFrontier()
-    frontier.add(root)
 
-    explored = set()
+def bipartite_path(source, target, stats=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs that connect
+    the source to the target, searching people and movies breadth-first
+    so that every movie and every person is expanded at most once.
+
+    If no possible path, returns None.
+    """
+    if source == target:
+        return []
 
-    while True:
-         # If nothing left in frontier, then no path
-        if frontier.empty():
-            raise Exception("no solution")
-        
+    reached = {source: Node(state=source, parent=None, action=None)}
+    expanded_movies = set()
+    frontier = QueueFrontier()
+    frontier.add(reached[source])
+
+    while not frontier.empty():
         node = frontier.remove()
+        if stats is not None:
+            stats.expanded += 1
+        for movie_id in people[node.state]["movies"]:
+
+            # Every star of a movie is reached the first time it is expanded
+            if movie_id in expanded_movies:
+                continue
+            expanded_movies.add(movie_id)
 
-        if node.state == target:
-            solution = []
-
-            while node.parent is not None:
-                solution.append([node.action, node.state])
-                node = node.parent
-            
-            solution.reverse()
-            return solution
-        
-        explored.add((node.action, node.state))
-
-        for movie, actor in neighbors_for_person(node.state):
-            if not frontier.contains_state(actor) and (movie, actor) not in explored:
-                child = Node(state=actor, parent=node, action=movie)
+            stars = movies[movie_id]["stars"]
+            if stats is not None:
+                stats.duplicates += len(stars)
+            for person_id in stars:
+                if person_id in reached:
+                    continue
+                child = Node(state=person_id, parent=node, action=movie_id)
+                if stats is not None:
+                    stats.generated += 1
+                    stats.duplicates -= 1
+                if person_id == target:
+                    return _path_to(child)
+                reached[person_id] = child
                 frontier.add(child)
+        if stats is not None:
+            stats.observe(len(frontier), len(reached), frontier)
+
+    return None
+
+
+def bidirectional_path(source, target, stats=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs that connect
+    the source to the target, growing one breadth-first search from each
+    end and stopping as soon as a generated node is reached by the other.
+    Like bipartite_path, each side expands every movie at most once.
+
+    If no possible path, returns None.
+    """
+    if source == target:
+        return []
+
+    # Every node reached so far from each end, keyed by state, and the
+    # movies each end has expanded
+    reached = (
+        {source: Node(state=source, parent=None, action=None)},
+        {target: Node(state=target, parent=None, action=None)}
+    )
+    expanded_movies = (set(), set())
+    frontiers = (QueueFrontier(), QueueFrontier())
+    frontiers[0].add(reached[0][source])
+    frontiers[1].add(reached[1][target])
+
+    while not frontiers[0].empty() and not frontiers[1].empty():
+
+        # Expand one whole layer of the smaller frontier
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        frontier, mine, theirs = frontiers[side], reached[side], reached[1 - side]
+        expanded = expanded_movies[side]
+
+        for _ in range(len(frontier)):
+            node = frontier.remove()
+            if stats is not None:
+                stats.expanded += 1
+            for movie in people[node.state]["movies"]:
+                if movie in expanded:
+                    continue
+                expanded.add(movie)
+                stars = movies[movie]["stars"]
+                if stats is not None:
+                    stats.duplicates += len(stars)
+                for actor in stars:
+                    if actor in mine:
+                        continue
+                    child = Node(state=actor, parent=node, action=movie)
+                    if stats is not None:
+                        stats.generated += 1
+                        stats.duplicates -= 1
+
+                    # Goal test on generation: the two searches have met
+                    if actor in theirs:
+                        if side == 0:
+                            return _join_paths(child, theirs[actor])
+                        return _join_paths(theirs[actor], child)
+
+                    mine[actor] = child
+                    frontier.add(child)
+
+        if stats is not None:
+            stats.observe(len(frontiers[0]) + len(frontiers[1]), len(mine) + len(theirs), frontiers)
+
+    return None
+
+
+def _path_to(node):
+    """
+    Returns the (movie_id, person_id) pairs leading from the root to a node.
+    """
+    return list(zip(*node.path()))
+
+
+def _join_paths(forward, backward):
+    """
+    Joins a node reached from the source with a node for the same person
+    reached from the target into a list of (movie_id, person_id) pairs.
+    """
+    solution = _path_to(forward)
+
+    # Walking back towards the target, each movie links a node to its parent
+    node = backward
+    while node.parent is not None:
+        solution.append((node.action, node.parent.state))
+        node = node.parent
+    return solution
+
+
+def enable_source_cache(max_bytes):
+    """
+    Keeps the complete BFS tree of recently used sources, up to `max_bytes`
+    in total, so that later queries from the same source only walk parent
+    links. Needs the "csr" backend; load_data drops the cache.
+    """
+    global source_cache
+    if graph is None:
+        raise ValueError("source cache needs the csr backend")
+    source_cache = TreeCache(graph, max_bytes)
+    return source_cache
+
+
+def load_landmarks(directory, k=LANDMARKS, rebuild=False):
+    """
+    Loads the landmark index saved for `directory`, building and saving it
+    with `k` landmarks if there is none for the current data (or if
+    `rebuild`). Needs the "csr" backend; load_data drops the index.
+    """
+    global landmarks
+    if graph is None:
+        raise ValueError("landmarks need the csr backend")
+    index = None if rebuild else LandmarkIndex.load(directory)
+    if index is None:
+        index = LandmarkIndex.build(graph, k)
+        try:
+            index.save(directory)
+        except OSError:
+            pass
+    landmarks = index
+    return index
+
+
+def degree_bounds(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees of separation between two
+    person IDs from the landmark index, without searching. Upper is None
+    if no landmark reaches both; both are None if they are not connected.
+    """
+    if landmarks is None:
+        raise ValueError("degree bounds need a landmark index, see load_landmarks")
+    return landmarks.bounds(_person_index(source), _person_index(target))
+
+
+def _person_index(person_id):
+    index = graph.person_index(person_id)
+    if index is None:
+        raise KeyError(person_id)
+    return index
+
+
+def _movie_index(movie_id):
+    index = graph.movie_index(movie_id)
+    if index is None:
+        raise KeyError(movie_id)
+    return index
+
+
+def movie_filter(min_year=None, max_year=None, movie_ids=None):
+    """
+    Returns a filter for shortest_path that lets through the movies
+    released between `min_year` and `max_year` (inclusive, either may be
+    None) and, if `movie_ids` is given, only those movies. Needs the "csr"
+    backend.
+
+    Filters are bitmaps over movie indexes, compiled once per set of
+    arguments and reused, so they cost nothing per edge beyond a byte
+    lookup. Filters from before apply_delta added movies are out of date.
+    """
+    if graph is None:
+        raise ValueError("search filters need the csr backend")
+    key = ("movies", min_year, max_year, None if movie_ids is None else frozenset(movie_ids))
+    if key not in filters:
+        filters[key] = graph.movie_mask(min_year, max_year, key[3])
+    return filters[key]
+
+
+def person_filter(person_ids=None, exclude_ids=()):
+    """
+    Returns a filter for shortest_path that lets through the people in
+    `person_ids` (everyone if None) except those in `exclude_ids`. Needs
+    the "csr" backend; filters from before apply_delta added people are
+    out of date.
+    """
+    if graph is None:
+        raise ValueError("search filters need the csr backend")
+    key = ("people", None if person_ids is None else frozenset(person_ids), frozenset(exclude_ids))
+    if key not in filters:
+        filters[key] = graph.person_mask(key[1], key[2])
+    return filters[key]
+
+
+def _graph_path(source, target, strategy, movies_allowed=None, people_allowed=None, stats=None):
+    """
+    Runs shortest_path on the compact graph, translating IMDB ids to
+    indexes and back.
+    """
+    with _phase(stats, "lookup"):
+        indexes = (_person_index(source), _person_index(target))
+    if movies_allowed is not None and len(movies_allowed) != graph.movie_count:
+        raise ValueError("movie filter is out of date, see movie_filter")
+    if people_allowed is not None and len(people_allowed) != graph.person_count:
+        raise ValueError("person filter is out of date, see person_filter")
+    masks = (movies_allowed, people_allowed)
+
+    # Cached trees only hold unfiltered paths
+    if source_cache is not None and masks == (None, None):
+        with _phase(stats, "cache"):
+            path = source_cache.path(*indexes)
+    elif strategy == "astar":
+        if landmarks is None:
+            raise ValueError("astar search needs a landmark index, see load_landmarks")
+        path = graph.shortest_path(*indexes, strategy, landmarks.heuristic(indexes[1]), *masks, stats)
+    else:
+        path = graph.shortest_path(*indexes, strategy, None, *masks, stats)
+    if path is None:
+        return None
+    with _phase(stats, "path"):
+        return [(graph.movie_ids[movie], graph.person_ids[person]) for movie, person in path]
 
 
+def _phase(stats, name):
+    return stats.phase(name) if stats is not None else nullcontext()
+
+
+def component(person_id):
+    """
+    Returns the label of the connected component of a person.
+    """
+    if graph is not None:
+        return graph.component(_person_index(person_id))
+    return find_label(merged_components, components[person_id])
+
+
+def component_size(person_id):
+    """
+    Returns the number of people in the connected component of a person.
+    """
+    if graph is not None:
+        return graph.component_size(_person_index(person_id))
+    return component_sizes[component(person_id)]
+
+
+def component_stats():
+    """
+    Returns the number of connected components, the size of the largest
+    one and the number of people who share no movie with anyone else.
+    """
+    if graph is not None:
+        sizes = graph.all_component_sizes()
+    else:
+        sizes = [
+            size for label, size in enumerate(component_sizes)
+            if label not in merged_components
+        ]
+    return {
+        "components": len(sizes),
+        "largest": max(sizes, default=0),
+        "isolated": sum(1 for size in sizes if size == 1)
+    }
+
+
+def apply_delta(people_rows=(), movie_rows=(), star_rows=(), directory=None):
+    """
+    Adds (id, name, birth) people rows, (id, title, year) movie rows and
+    (person_id, movie_id) star rows to the loaded data, skipping known
+    IDs and credits and star rows that name an unknown person or movie.
+    With `directory`, the added rows are also recorded in its journal so
+    that later calls to load_data include them.
+
+    Dependent indexes are updated in place where possible; cached BFS
+    trees and the landmark index are dropped only if a component they
+    cover gained credits. Returns the numbers of people, movies and
+    credits added.
+    """
+    global landmarks
+    added_people, added_movies, added_stars = [], [], []
+
+    for person_id, name, birth in people_rows:
+        if (graph.person_index(person_id) if graph is not None else people.get(person_id)) is not None:
+            continue
+        added_people.append((person_id, name, birth))
+        if graph is not None:
+            graph.add_person(person_id, name, birth)
+            continue
+        people[person_id] = {"name": name, "birth": birth, "movies": set()}
+        names.setdefault(name.lower(), set()).add(person_id)
+        components[person_id] = len(component_sizes)
+        component_sizes.append(1)
+        if name_index is not None:
+            name_index.add(person_id, name, birth)
+
+    for movie_id, title, year in movie_rows:
+        if (graph.movie_index(movie_id) if graph is not None else movies.get(movie_id)) is not None:
+            continue
+        added_movies.append((movie_id, title, year))
+        if graph is not None:
+            graph.add_movie(movie_id, title, year)
+        else:
+            movies[movie_id] = {"title": title, "year": year, "stars": set()}
+
+    for person_id, movie_id in star_rows:
+        if graph is not None:
+            person, movie = graph.person_index(person_id), graph.movie_index(movie_id)
+            if person is None or movie is None or not graph.add_credit(person, movie):
+                continue
+        else:
+            if person_id not in people or movie_id not in movies:
+                continue
+            if movie_id in people[person_id]["movies"]:
+                continue
+            _merge_components(person_id, movies[movie_id]["stars"])
+            people[person_id]["movies"].add(movie_id)
+            movies[movie_id]["stars"].add(person_id)
+        added_stars.append((person_id, movie_id))
+
+    # Only components that gained credits have new paths
+    touched = {component(person_id) for person_id, _ in added_stars}
+    if touched and source_cache is not None:
+        source_cache.discard_components(touched)
+    if touched and landmarks is not None:
+        if any(graph.component(landmark) in touched for landmark in landmarks.landmarks):
+            landmarks = None
+
+    # Compiled filters are sized to the old tables
+    if added_people or added_movies:
+        filters.clear()
+
+    if directory is not None and (added_people or added_movies or added_stars):
+        append_journal(directory, added_people, added_movies, added_stars)
+    return {"people": len(added_people), "movies": len(added_movies), "stars": len(added_stars)}
+
+
+def _merge_components(person_id, stars):
+    """
+    Merges the component of a person into that of the stars of a movie
+    they are being added to.
+    """
+    if not stars:
+        return
+    first, second = component(person_id), component(next(iter(stars)))
+    if first == second:
+        return
+    if component_sizes[first] < component_sizes[second]:
+        first, second = second, first
+    merged_components[second] = first
+    component_sizes[first] += component_sizes[second]
+
+
+def complete_name(prefix, limit=10):
+    """
+    Returns up to `limit` (person_id, name, birth) tuples for people whose
+    name starts with `prefix`, ignoring case.
+    """
+    return name_index.prefix(prefix, limit)
+
+
+def match_name(name, max_distance=2, limit=10):
+    """
+    Returns up to `limit` (person_id, name, birth) tuples for people whose
+    name is within `max_distance` edits of `name`, closest first.
+    """
+    return name_index.fuzzy(name, max_distance, limit)
+
 
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    if graph is not None:
+        person_ids = [graph.person_ids[person] for person in graph.people_named(name)]
+    else:
+        person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
+            name = person_name(person_id)
+            birth = person_birth(person_id)
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
         try:
             person_id = input("Intended Person ID: ")
@@ -155,6 +711,11 @@ def neighbors_for_person(person_id):
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return {
+            (graph.movie_ids[movie], graph.person_ids[person])
+            for movie, person in graph.neighbors(_person_index(person_id))
+        }
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -163,5 +724,23 @@ def neighbors_for_person(person_id):
     return neighbors
 
 
+def person_name(person_id):
+    if graph is not None:
+        return graph.person_names[_person_index(person_id)]
+    return people[person_id]["name"]
+
+
+def person_birth(person_id):
+    if graph is not None:
+        return graph.person_births[_person_index(person_id)]
+    return people[person_id]["birth"]
+
+
+def movie_title(movie_id):
+    if graph is not None:
+        return graph.movie_titles[_movie_index(movie_id)]
+    return movies[movie_id]["title"]
+
+
 if __name__ == "__main__":
     main()
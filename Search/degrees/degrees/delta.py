@@ -0,0 +1,139 @@
+"""
+Incremental updates for degrees.
+
+New people, movies and credits are appended to a journal next to the CSV
+files instead of rewriting them, so the graph snapshot stays valid. The
+snapshot and name index record how much of the journal they already
+include; load_data replays only the rows after that, and running
+processes apply the same rows in memory with degrees.apply_delta.
+
+Rows replayed on top of the snapshot are kept outside its packed arrays,
+and lookups scan the people among them one by one. Once more than
+COMPACT_ROWS are waiting, or with --compact, load_data folds the whole
+journal into a rebuilt snapshot and name index instead.
+
+Journal rows are CSV: "person,id,name,birth", "movie,id,title,year" or
+"star,person_id,movie_id".
+
+Usage: python delta.py directory [delta_directory] [--compact]
+
+where delta_directory holds any of people.csv, movies.csv and stars.csv
+in the same format as the data set.
+"""
+
+import argparse
+import csv
+import io
+import os
+
+JOURNAL = "degrees.journal"
+
+# Journal rows replayed on top of the snapshot beyond which load_data
+# rebuilds the snapshot with them folded in
+COMPACT_ROWS = 1000
+
+
+def journal_path(directory):
+    return os.path.join(directory, JOURNAL)
+
+
+def read_delta_directory(delta_directory):
+    """
+    Returns (people, movies, stars) rows from whichever of people.csv,
+    movies.csv and stars.csv exist in `delta_directory`.
+    """
+    files = (
+        ("people.csv", ("id", "name", "birth")),
+        ("movies.csv", ("id", "title", "year")),
+        ("stars.csv", ("person_id", "movie_id"))
+    )
+    rows = []
+    for name, fields in files:
+        path = os.path.join(delta_directory, name)
+        if not os.path.exists(path):
+            rows.append([])
+            continue
+        with open(path, encoding="utf-8", newline="") as f:
+            rows.append([tuple(row[field] for field in fields) for row in csv.DictReader(f)])
+    return tuple(rows)
+
+
+def journal_size(directory):
+    """
+    Returns the size in bytes of the complete rows of the journal of
+    `directory`, leaving out a row still being appended (0 if there is no
+    journal).
+    """
+    try:
+        f = open(journal_path(directory), "rb")
+    except FileNotFoundError:
+        return 0
+    with f:
+        end = f.seek(0, os.SEEK_END)
+        while end > 0:
+            f.seek(max(end - 4096, 0))
+            block = f.read(end - f.tell())
+            newline = block.rfind(b"\n")
+            if newline != -1:
+                return end - len(block) + newline + 1
+            end -= len(block)
+        return 0
+
+
+def read_journal(directory, start=0, end=None):
+    """
+    Returns (people, movies, stars) rows recorded in the journal of
+    `directory`, which are empty if there is no journal. With `start` and
+    `end`, only the rows between those byte offsets are read; both must
+    fall between rows, as offsets returned by journal_size do.
+    """
+    people, movies, stars = [], [], []
+    kinds = {"person": people, "movie": movies, "star": stars}
+    try:
+        f = open(journal_path(directory), "rb")
+    except FileNotFoundError:
+        return people, movies, stars
+    with f:
+        f.seek(start)
+        data = f.read() if end is None else f.read(max(end - start, 0))
+    for row in csv.reader(io.StringIO(data.decode("utf-8"), newline="")):
+        if row and row[0] in kinds:
+            kinds[row[0]].append(tuple(row[1:]))
+    return people, movies, stars
+
+
+def append_journal(directory, people=(), movies=(), stars=()):
+    """
+    Appends rows to the journal of `directory`.
+    """
+    with open(journal_path(directory), "a", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerows(("person", *row) for row in people)
+        writer.writerows(("movie", *row) for row in movies)
+        writer.writerows(("star", *row) for row in stars)
+
+
+def main():
+    import degrees
+
+    parser = argparse.ArgumentParser(description="Add people, movies and credits to a degrees data set.")
+    parser.add_argument("directory")
+    parser.add_argument("delta_directory", nargs="?")
+    parser.add_argument("--backend", choices=["dict", "csr"], default="csr")
+    parser.add_argument("--compact", action="store_true",
+                        help="fold the whole journal into the snapshot and name index")
+    args = parser.parse_args()
+    if args.delta_directory is None and not args.compact:
+        parser.error("a delta directory or --compact is required")
+
+    if args.delta_directory is not None:
+        degrees.load_data(args.directory, backend=args.backend)
+        added = degrees.apply_delta(*read_delta_directory(args.delta_directory), directory=args.directory)
+        print(f"Added {added['people']} people, {added['movies']} movies and {added['stars']} credits.")
+    if args.compact:
+        degrees.load_data(args.directory, backend="csr", compact=True)
+        print(f"Folded {journal_size(args.directory)} bytes of journal into the snapshot.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Synthetic data sets for degrees.
+
+Writes people.csv, movies.csv and stars.csv in the same format as the
+IMDB export, at any scale and reproducibly from a seed. Cast sizes follow
+a power law, and so do careers: a few people star in many movies and
+most in one or two, which is what makes a few people hubs of the co-star
+graph. Some people are never credited, and some small groups only work
+with each other, so that not everyone is connected.
+
+The full IMDB export has about 1,044,000 people, 344,000 movies and
+1,190,000 credits: pass --people 1044000 --movies 344000 for a data set
+of that size.
+
+Usage: python generate.py directory [--people N] [--movies N] [--seed S]
+"""
+
+import argparse
+import bisect
+import csv
+import itertools
+import os
+import random
+
+FIRST_NAMES = (
+    "Adam", "Alice", "Amir", "Ana", "Ben", "Carla", "Chen", "Chris", "Dana",
+    "David", "Elena", "Emma", "Felix", "Grace", "Hana", "Ivan", "Jack", "James",
+    "Jin", "Julia", "Kate", "Kevin", "Lars", "Laura", "Leo", "Lucy", "Maria",
+    "Mark", "Mei", "Nina", "Omar", "Paul", "Priya", "Rosa", "Sam", "Sara",
+    "Tom", "Uma", "Victor", "Yuki"
+)
+
+SYLLABLES = (
+    "ba", "ber", "cas", "del", "dor", "el", "fer", "gan", "hal", "in", "kel",
+    "lan", "lo", "mar", "mi", "nor", "os", "pa", "ren", "ri", "sal", "son",
+    "ta", "ton", "vak", "ver", "wil", "zo"
+)
+
+TITLE_WORDS = (
+    "Night", "Return", "City", "Love", "Last", "Dark", "River", "Secret",
+    "Summer", "King", "Road", "Star", "Blood", "House", "Lost", "Wild",
+    "Storm", "Dream", "Girl", "Man", "War", "Heart", "Fire", "Game"
+)
+
+# Cast sizes are int(MIN_CAST * X) for a Pareto distributed X, capped
+MIN_CAST = 2
+MAX_CAST = 300
+
+# People in each group that only works with itself
+ISLAND_SIZE = 8
+
+
+def person_name(rng):
+    last = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3)))
+    return f"{rng.choice(FIRST_NAMES)} {last.capitalize()}"
+
+
+def movie_title(rng):
+    words = rng.sample(TITLE_WORDS, rng.randint(1, 3))
+    title = " ".join(words)
+    if rng.random() < 0.05:
+        title = f"{title}, Part {rng.randint(2, 4)}"
+    elif rng.random() < 0.02:
+        title = f'The "{title}"'
+    return title
+
+
+def ids(rng, count, start):
+    """
+    Returns `count` increasing IMDB-style numeric IDs with gaps.
+    """
+    found = []
+    value = start
+    for _ in range(count):
+        value += rng.randint(1, 4)
+        found.append(value)
+    return found
+
+
+def cast_size(rng, alpha, limit):
+    return min(int(MIN_CAST * rng.paretovariate(alpha)), MAX_CAST, limit)
+
+
+def generate(directory, people=100000, movies=33000, seed=0, alpha=2.0,
+             uncredited=0.05, islands=0.02, popularity=0.5):
+    """
+    Writes a synthetic data set to `directory`. Returns the numbers of
+    people, movies and credits written.
+
+    `alpha` is the Pareto shape of cast sizes (smaller is heavier-tailed)
+    and `popularity` the Zipf exponent of how often people are cast.
+    `uncredited` is the fraction of people in no movie and `islands` the
+    fraction of people in small groups cut off from everyone else.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    person_ids = ids(rng, people, 100)
+    movie_ids = ids(rng, movies, 1000000)
+
+    # Split people into the uncredited, the islands and the main pool
+    order = list(range(people))
+    rng.shuffle(order)
+    island_count = int(people * islands) // ISLAND_SIZE
+    split = int(people * uncredited)
+    island_people = order[split:split + island_count * ISLAND_SIZE]
+    pool = order[split + island_count * ISLAND_SIZE:]
+
+    # Zipf popularity over the main pool, in random order
+    cumulative = list(itertools.accumulate(
+        1 / rank ** popularity for rank in range(1, len(pool) + 1)
+    ))
+
+    with open(os.path.join(directory, "people.csv"), "w", encoding="utf-8", newline="") as f:
+        f.write("id,name,birth\n")
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC, lineterminator="\n")
+        for person_id in person_ids:
+            birth = rng.randint(1900, 2010) if rng.random() < 0.8 else None
+            writer.writerow((person_id, person_name(rng), birth))
+
+    with open(os.path.join(directory, "movies.csv"), "w", encoding="utf-8", newline="") as f:
+        f.write("id,title,year\n")
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC, lineterminator="\n")
+        for movie_id in movie_ids:
+            writer.writerow((movie_id, movie_title(rng), rng.randint(1910, 2025)))
+
+    credits = 0
+    with open(os.path.join(directory, "stars.csv"), "w", encoding="utf-8", newline="") as f:
+        f.write("person_id,movie_id\n")
+        writer = csv.writer(f, lineterminator="\n")
+        for movie, movie_id in enumerate(movie_ids):
+
+            # Island movies are shared out over the islands first
+            if movie < island_count * 2:
+                island = island_people[(movie % island_count) * ISLAND_SIZE:][:ISLAND_SIZE]
+                cast = set(rng.sample(island, rng.randint(1, ISLAND_SIZE)))
+            elif not pool:
+                continue
+            else:
+                size = cast_size(rng, alpha, len(pool))
+                cast = set()
+                while len(cast) < size:
+                    rank = bisect.bisect(cumulative, rng.random() * cumulative[-1])
+                    cast.add(pool[min(rank, len(pool) - 1)])
+            writer.writerows((person_ids[person], movie_id) for person in sorted(cast))
+            credits += len(cast)
+    return people, movies, credits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic data set for degrees.")
+    parser.add_argument("directory")
+    parser.add_argument("--people", type=int, default=100000)
+    parser.add_argument("--movies", type=int, default=33000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--alpha", type=float, default=2.0,
+                        help="Pareto shape of cast sizes (default: 2.0)")
+    parser.add_argument("--popularity", type=float, default=0.5,
+                        help="Zipf exponent of how often people are cast (default: 0.5)")
+    parser.add_argument("--uncredited", type=float, default=0.05,
+                        help="fraction of people in no movie (default: 0.05)")
+    parser.add_argument("--islands", type=float, default=0.02,
+                        help="fraction of people in small isolated groups (default: 0.02)")
+    args = parser.parse_args()
+
+    people, movies, credits = generate(
+        args.directory, args.people, args.movies, args.seed, args.alpha,
+        args.uncredited, args.islands, args.popularity
+    )
+    print(f"Wrote {people} people, {movies} movies and {credits} credits to {args.directory}.")
+
+
+if __name__ == "__main__":
+    main()
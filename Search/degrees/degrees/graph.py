@@ -0,0 +1,706 @@
+"""
+Compact co-star graph for degrees.
+
+People and movies are numbered with dense integer indexes in file order.
+Adjacency is stored in CSR (compressed sparse row) form: the movies of
+person p are person_movies[person_offsets[p]:person_offsets[p + 1]] and the
+stars of movie m are movie_people[movie_offsets[m]:movie_offsets[m + 1]].
+"""
+
+import heapq
+
+from array import array
+
+# String tables and adjacency arrays that make up a graph, in snapshot order
+TABLES = ("person_ids", "person_names", "person_births", "movie_ids", "movie_titles", "movie_years")
+ARRAYS = ("person_offsets", "person_movies", "movie_offsets", "movie_people")
+
+# Sort keys of the ordered string tables
+TABLE_KEYS = {"person_ids": None, "person_names": str.lower, "movie_ids": None}
+
+
+class StringTable():
+    """
+    Sequence of strings packed into a single utf-8 blob.
+
+    If `order` is given it lists the indexes sorted by `key(string)`, which
+    lets find_all look values up by binary search. Strings appended later
+    are kept in a plain list after the packed ones.
+    """
+
+    def __init__(self, blob, offsets, order=None, key=None):
+        self.blob = blob
+        self.offsets = offsets
+        self.order = order
+        self.key = key
+        self.packed = len(offsets) - 1
+
+        # Appended strings, and their indexes by key if the table is ordered
+        self.extra = []
+        self.extra_keys = {}
+
+    @classmethod
+    def build(cls, strings, ordered=False, key=None):
+        blob = bytearray()
+        offsets = array("q", [0])
+        for string in strings:
+            blob += string.encode("utf-8")
+            offsets.append(len(blob))
+
+        order = None
+        if ordered:
+            sort_key = strings.__getitem__ if key is None else (lambda i: key(strings[i]))
+            order = array("i", sorted(range(len(strings)), key=sort_key))
+        return cls(bytes(blob), offsets, order, key)
+
+    def __len__(self):
+        return self.packed + len(self.extra)
+
+    def __getitem__(self, i):
+        if i >= self.packed:
+            return self.extra[i - self.packed]
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def append(self, value):
+        if self.order is not None:
+            key = value if self.key is None else self.key(value)
+            self.extra_keys.setdefault(key, []).append(len(self))
+        self.extra.append(value)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def sort_key(self, i):
+        return self[i] if self.key is None else self.key(self[i])
+
+    def lower_bound(self, value):
+        """
+        Returns the first position in `order` whose key is not less than
+        `value` (which must already have the key applied).
+        """
+        lo, hi = 0, len(self.order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.sort_key(self.order[mid]) < value:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find_all(self, value):
+        """
+        Returns the indexes of every string equal to `value` under the key.
+        """
+        if self.order is None:
+            raise ValueError("string table is not ordered")
+        value = value if self.key is None else self.key(value)
+        found = []
+        position = self.lower_bound(value)
+        while position < len(self.order) and self.sort_key(self.order[position]) == value:
+            found.append(self.order[position])
+            position += 1
+        return found + self.extra_keys.get(value, [])
+
+    def find(self, value):
+        """
+        Returns the lowest index holding `value`, or None.
+        """
+        found = self.find_all(value)
+        return min(found) if found else None
+
+
+def number_rows(rows):
+    """
+    Numbers rows by their ID (first field) in file order, keeping only the
+    first row for a repeated ID. Returns (index by ID, unique rows).
+    """
+    index = {}
+    unique = []
+    for row in rows:
+        if row[0] not in index:
+            index[row[0]] = len(unique)
+            unique.append(row)
+    return index, unique
+
+
+def find_label(merged, label):
+    """
+    Follows `merged` links from a component label to its current label,
+    shortening the chain on the way.
+    """
+    root = label
+    while root in merged:
+        root = merged[root]
+    while label in merged and merged[label] != root:
+        merged[label], label = root, merged[label]
+    return root
+
+
+def csr_arrays(sources, targets, size):
+    """
+    Groups parallel arrays of (source, target) edges by source.
+
+    Returns (offsets, values) where the targets of source s are
+    values[offsets[s]:offsets[s + 1]], sorted and without duplicates.
+    """
+
+    # Counting sort of the edges by source
+    starts = array("i", bytes(4 * (size + 1)))
+    for source in sources:
+        starts[source + 1] += 1
+    for i in range(size):
+        starts[i + 1] += starts[i]
+    grouped = array("i", bytes(4 * len(sources)))
+    fill = array("i", starts)
+    for source, target in zip(sources, targets):
+        grouped[fill[source]] = target
+        fill[source] += 1
+
+    # Sort each row and drop repeated edges
+    offsets = array("i", [0])
+    values = array("i")
+    for i in range(size):
+        values.extend(sorted(set(grouped[starts[i]:starts[i + 1]])))
+        offsets.append(len(values))
+    return offsets, values
+
+
+class Graph():
+    """
+    Person and movie tables with CSR adjacency in both directions.
+    """
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_people,
+                 components=None, component_sizes=None):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+
+        # Memoryviews so that slicing a row does not copy it
+        self.person_offsets = memoryview(person_offsets)
+        self.person_movies = memoryview(person_movies)
+        self.movie_offsets = memoryview(movie_offsets)
+        self.movie_people = memoryview(movie_people)
+
+        # Connected component label of each person and size of each
+        # component; labels merged by added credits point to their new label
+        self.components = components
+        self.component_sizes = component_sizes
+        self.merged_labels = {}
+
+        # Release year of each movie as a number, see movie_year_numbers
+        self.year_numbers = None
+
+        # Credits added by add_credit, by person and by movie
+        self.added_movies = {}
+        self.added_stars = {}
+
+    @classmethod
+    def from_edges(cls, people, movies, edge_people, edge_movies):
+        """
+        Builds a graph from people and movie rows plus parallel arrays of
+        person and movie indexes, one entry per starring credit.
+        """
+        person_offsets, person_movies = csr_arrays(edge_people, edge_movies, len(people))
+        reverse_people = array("i")
+        for person in range(len(people)):
+            count = person_offsets[person + 1] - person_offsets[person]
+            reverse_people.extend(array("i", [person]) * count)
+        movie_offsets, movie_people = csr_arrays(person_movies, reverse_people, len(movies))
+
+        graph = cls(
+            StringTable.build([row[0] for row in people], ordered=True),
+            StringTable.build([row[1] for row in people], ordered=True, key=TABLE_KEYS["person_names"]),
+            StringTable.build([row[2] for row in people]),
+            StringTable.build([row[0] for row in movies], ordered=True),
+            StringTable.build([row[1] for row in movies]),
+            StringTable.build([row[2] for row in movies]),
+            person_offsets, person_movies, movie_offsets, movie_people
+        )
+        graph.label_components()
+        return graph
+
+    @classmethod
+    def from_sections(cls, sections):
+        """
+        Rebuilds a graph from the named arrays returned by sections().
+        """
+        tables = []
+        for name in TABLES:
+            tables.append(StringTable(
+                sections[f"{name}.blob"],
+                sections[f"{name}.offsets"],
+                sections.get(f"{name}.order"),
+                TABLE_KEYS.get(name)
+            ))
+        return cls(
+            *tables, *(sections[name] for name in ARRAYS),
+            sections.get("components"), sections.get("component_sizes")
+        )
+
+    def sections(self):
+        """
+        Returns every array the graph is made of, keyed by name.
+        """
+        sections = {}
+        for name in TABLES:
+            table = getattr(self, name)
+            sections[f"{name}.blob"] = table.blob
+            sections[f"{name}.offsets"] = table.offsets
+            if table.order is not None:
+                sections[f"{name}.order"] = table.order
+        for name in ARRAYS:
+            sections[name] = getattr(self, name)
+        if self.components is not None:
+            sections["components"] = self.components
+            sections["component_sizes"] = self.component_sizes
+        return sections
+
+    def label_components(self):
+        """
+        Labels every person with the index of their connected component,
+        numbering components in order of their lowest person index.
+        """
+        components = array("i", [-1]) * self.person_count
+        sizes = array("i")
+        seen_movies = bytearray(self.movie_count)
+        for root in range(self.person_count):
+            if components[root] != -1:
+                continue
+            label = len(sizes)
+            components[root] = label
+            size = 1
+            frontier = [root]
+            while frontier:
+                person = frontier.pop()
+                for movie in self.movies_of(person):
+                    if seen_movies[movie]:
+                        continue
+                    seen_movies[movie] = 1
+                    for other in self.stars_of(movie):
+                        if components[other] == -1:
+                            components[other] = label
+                            size += 1
+                            frontier.append(other)
+            sizes.append(size)
+        self.components = components
+        self.component_sizes = sizes
+        self.merged_labels = {}
+
+    def component(self, person):
+        """
+        Returns the label of the connected component of a person.
+        """
+        if self.components is None:
+            self.label_components()
+        return find_label(self.merged_labels, self.components[person])
+
+    def connected(self, source, target):
+        """
+        Returns whether two people are in the same connected component.
+        """
+        return self.component(source) == self.component(target)
+
+    def component_size(self, person):
+        return self.component_sizes[self.component(person)]
+
+    def all_component_sizes(self):
+        """
+        Returns the size of every connected component.
+        """
+        if self.components is None:
+            self.label_components()
+        return [
+            size for label, size in enumerate(self.component_sizes)
+            if label not in self.merged_labels
+        ]
+
+    def _writable_components(self):
+        """
+        Copies memory-mapped component arrays so that they can be updated.
+        """
+        if self.components is None:
+            self.label_components()
+        if not isinstance(self.components, array):
+            self.components = array("i", self.components)
+            self.component_sizes = array("i", self.component_sizes)
+
+    def add_person(self, person_id, name, birth):
+        """
+        Adds a person with no movies, unless the ID is already known.
+        Returns the person's index.
+        """
+        person = self.person_index(person_id)
+        if person is not None:
+            return person
+        self._writable_components()
+        self.person_ids.append(person_id)
+        self.person_names.append(name)
+        self.person_births.append(birth)
+        self.components.append(len(self.component_sizes))
+        self.component_sizes.append(1)
+        return self.person_count - 1
+
+    def add_movie(self, movie_id, title, year):
+        """
+        Adds a movie with no stars, unless the ID is already known.
+        Returns the movie's index.
+        """
+        movie = self.movie_index(movie_id)
+        if movie is not None:
+            return movie
+        self.movie_ids.append(movie_id)
+        self.movie_titles.append(title)
+        self.movie_years.append(year)
+        return self.movie_count - 1
+
+    def add_credit(self, person, movie):
+        """
+        Records that a person starred in a movie, merging components as
+        needed. Returns False if the credit was already known.
+        """
+        if movie in self.movies_of(person):
+            return False
+        self._writable_components()
+
+        # Joining the movie links the person to everyone already in it
+        stars = self.stars_of(movie)
+        if len(stars):
+            first, second = self.component(person), self.component(stars[0])
+            if first != second:
+                if self.component_sizes[first] < self.component_sizes[second]:
+                    first, second = second, first
+                self.merged_labels[second] = first
+                self.component_sizes[first] += self.component_sizes[second]
+
+        self.added_movies.setdefault(person, []).append(movie)
+        self.added_stars.setdefault(movie, []).append(person)
+        return True
+
+    @property
+    def person_count(self):
+        return len(self.person_ids)
+
+    @property
+    def movie_count(self):
+        return len(self.movie_ids)
+
+    def person_index(self, person_id):
+        return self.person_ids.find(person_id)
+
+    def movie_index(self, movie_id):
+        return self.movie_ids.find(movie_id)
+
+    def people_named(self, name):
+        """
+        Returns the indexes of every person with the given name, ignoring case.
+        """
+        return sorted(self.person_names.find_all(name))
+
+    def movies_of(self, person):
+        if self.added_movies and person in self.added_movies:
+            return [*self._packed_movies(person), *self.added_movies[person]]
+        return self._packed_movies(person)
+
+    def stars_of(self, movie):
+        if self.added_stars and movie in self.added_stars:
+            return [*self._packed_stars(movie), *self.added_stars[movie]]
+        return self._packed_stars(movie)
+
+    def _packed_movies(self, person):
+        if person >= self.person_ids.packed:
+            return []
+        return self.person_movies[self.person_offsets[person]:self.person_offsets[person + 1]]
+
+    def _packed_stars(self, movie):
+        if movie >= self.movie_ids.packed:
+            return []
+        return self.movie_people[self.movie_offsets[movie]:self.movie_offsets[movie + 1]]
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) index pairs for people who starred with a
+        given person, including the person themself.
+        """
+        for movie in self.movies_of(person):
+            for other in self.stars_of(movie):
+                yield movie, other
+
+    def shortest_path(self, source, target, strategy="bidirectional", heuristic=None,
+                      movie_mask=None, person_mask=None, stats=None):
+        """
+        Returns the shortest list of (movie, person) index pairs that
+        connect the source to the target, or None if they are not connected.
+
+        The "astar" strategy needs a `heuristic` giving an admissible lower
+        bound on the distance from a person to the target, or None if the
+        person cannot reach the target.
+
+        `movie_mask` and `person_mask` are bitmaps from movie_mask() and
+        person_mask(); paths only use movies and people whose byte is set.
+
+        The search is recorded in `stats` (a util.SearchStats) if given;
+        people count as nodes.
+        """
+        if not self.connected(source, target):
+            return None
+        if person_mask is not None and not (person_mask[source] and person_mask[target]):
+            return None
+        if strategy == "bidirectional":
+            search, args = self._bidirectional_path, ()
+        elif strategy == "bipartite":
+            search, args = self._bipartite_path, ()
+        elif strategy == "bfs":
+            search, args = self._bfs_path, ()
+        elif strategy == "astar":
+            if heuristic is None:
+                raise ValueError("astar search needs a heuristic")
+            search, args = self._astar_path, (heuristic,)
+        else:
+            raise ValueError(f"unknown search strategy: {strategy}")
+        if stats is None:
+            return search(source, target, *args, movie_mask, person_mask)
+        with stats.phase("search"):
+            return search(source, target, *args, movie_mask, person_mask, stats)
+
+    def movie_mask(self, min_year=None, max_year=None, movie_ids=None):
+        """
+        Returns a bitmap of the movies released between `min_year` and
+        `max_year` (inclusive, either may be None) and, if `movie_ids` is
+        given, among those IDs. Movies without a year only pass if no year
+        bound is given.
+        """
+        if movie_ids is None:
+            mask = bytearray(b"\x01") * self.movie_count
+        else:
+            mask = bytearray(self.movie_count)
+            for movie_id in movie_ids:
+                movie = self.movie_index(movie_id)
+                if movie is not None:
+                    mask[movie] = 1
+        if min_year is not None or max_year is not None:
+            low = min_year if min_year is not None else -1
+            high = max_year if max_year is not None else 1 << 15
+            for movie, year in enumerate(self.movie_year_numbers()):
+                if not low <= year <= high or year == 0:
+                    mask[movie] = 0
+        return mask
+
+    def person_mask(self, person_ids=None, exclude_ids=()):
+        """
+        Returns a bitmap of the people in `person_ids` (everyone if None)
+        who are not in `exclude_ids`.
+        """
+        if person_ids is None:
+            mask = bytearray(b"\x01") * self.person_count
+        else:
+            mask = bytearray(self.person_count)
+            for person_id in person_ids:
+                person = self.person_index(person_id)
+                if person is not None:
+                    mask[person] = 1
+        for person_id in exclude_ids:
+            person = self.person_index(person_id)
+            if person is not None:
+                mask[person] = 0
+        return mask
+
+    def movie_year_numbers(self):
+        """
+        Returns an array of movie release years, with 0 for unknown years.
+        """
+        if self.year_numbers is None or len(self.year_numbers) != self.movie_count:
+            self.year_numbers = array("h", (
+                int(year) if year.isdigit() else 0 for year in self.movie_years
+            ))
+        return self.year_numbers
+
+    def _bfs_path(self, source, target, movie_mask=None, person_mask=None, stats=None):
+        if source == target:
+            return []
+
+        # Maps each reached person to the (movie, person) it was reached by
+        parents = {source: None}
+        frontier = [source]
+        while frontier:
+            layer = []
+            for person in frontier:
+                if stats is not None:
+                    stats.expanded += 1
+                for movie in self.movies_of(person):
+                    if movie_mask is not None and not movie_mask[movie]:
+                        continue
+                    stars = self.stars_of(movie)
+                    if stats is not None:
+                        stats.duplicates += len(stars)
+                    for other in stars:
+                        if other in parents or person_mask is not None and not person_mask[other]:
+                            continue
+                        parents[other] = (movie, person)
+                        if other == target:
+                            _record(stats, len(layer) + 1, len(layer), len(parents))
+                            return _walk(parents, target)
+                        layer.append(other)
+            _record(stats, len(layer), len(layer), len(parents), layer)
+            frontier = layer
+        return None
+
+    def _bipartite_path(self, source, target, movie_mask=None, person_mask=None, stats=None):
+        if source == target:
+            return []
+
+        # Movies are intermediate nodes: expanding a movie reaches all of
+        # its stars, so no movie is expanded twice
+        parents = {source: None}
+        expanded = set()
+        frontier = [source]
+        while frontier:
+            layer = []
+            for person in frontier:
+                if stats is not None:
+                    stats.expanded += 1
+                for movie in self.movies_of(person):
+                    if movie in expanded or movie_mask is not None and not movie_mask[movie]:
+                        continue
+                    expanded.add(movie)
+                    stars = self.stars_of(movie)
+                    if stats is not None:
+                        stats.duplicates += len(stars)
+                    for other in stars:
+                        if other in parents or person_mask is not None and not person_mask[other]:
+                            continue
+                        parents[other] = (movie, person)
+                        if other == target:
+                            _record(stats, len(layer) + 1, len(layer), len(parents))
+                            return _walk(parents, target)
+                        layer.append(other)
+            _record(stats, len(layer), len(layer), len(parents), layer)
+            frontier = layer
+        return None
+
+    def _bidirectional_path(self, source, target, movie_mask=None, person_mask=None, stats=None):
+        if source == target:
+            return []
+
+        # Each side maps the people it reached to the (movie, person) link
+        # that reached them and keeps the movies it expanded; the search
+        # stops when one side generates a person already reached by the other
+        parents = ({source: None}, {target: None})
+        expanded_movies = (set(), set())
+        frontiers = ([source], [target])
+        while frontiers[0] and frontiers[1]:
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            mine, theirs = parents[side], parents[1 - side]
+            expanded = expanded_movies[side]
+            layer = []
+            for person in frontiers[side]:
+                if stats is not None:
+                    stats.expanded += 1
+                for movie in self.movies_of(person):
+                    if movie in expanded or movie_mask is not None and not movie_mask[movie]:
+                        continue
+                    expanded.add(movie)
+                    stars = self.stars_of(movie)
+                    if stats is not None:
+                        stats.duplicates += len(stars)
+                    for other in stars:
+                        if other in mine or person_mask is not None and not person_mask[other]:
+                            continue
+                        mine[other] = (movie, person)
+                        if other in theirs:
+                            _record(stats, len(layer) + 1, len(layer) + len(frontiers[1 - side]),
+                                    len(mine) + len(theirs))
+                            return _join(parents[0], parents[1], other)
+                        layer.append(other)
+            frontiers = (layer, frontiers[1]) if side == 0 else (frontiers[0], layer)
+            _record(stats, len(layer), len(frontiers[0]) + len(frontiers[1]),
+                    len(mine) + len(theirs), frontiers)
+        return None
+
+    def _astar_path(self, source, target, heuristic, movie_mask=None, person_mask=None, stats=None):
+        estimate = heuristic(source)
+        if estimate is None:
+            return None
+
+        # Heap of (estimated total, -distance, person); among equal
+        # estimates the deepest person is expanded first
+        parents = {source: None}
+        distances = {source: 0}
+        heap = [(estimate, 0, source)]
+        while heap:
+            _, negative, person = heapq.heappop(heap)
+            if person == target:
+                return _walk(parents, target)
+            distance = -negative
+            if distance > distances[person]:
+                continue
+            if stats is not None:
+                stats.expanded += 1
+            for movie in self.movies_of(person):
+                if movie_mask is not None and not movie_mask[movie]:
+                    continue
+                stars = self.stars_of(movie)
+                if stats is not None:
+                    stats.duplicates += len(stars)
+                for other in stars:
+                    if distance + 1 >= distances.get(other, distance + 2):
+                        continue
+                    if person_mask is not None and not person_mask[other]:
+                        continue
+                    estimate = heuristic(other)
+                    if estimate is None:
+                        continue
+                    distances[other] = distance + 1
+                    parents[other] = (movie, person)
+                    heapq.heappush(heap, (distance + 1 + estimate, -distance - 1, other))
+                    if stats is not None:
+                        stats.generated += 1
+                        stats.duplicates -= 1
+            if stats is not None:
+                stats.observe(len(heap), len(distances), heap)
+        return None
+
+
+def _record(stats, generated, frontier_size, reached, frontier=None):
+    """
+    Records a layer of a breadth-first search that generated `generated`
+    people in `stats`, if given. The stars of expanded movies were counted
+    as duplicates up front, so the people generated are taken back out.
+    """
+    if stats is None:
+        return
+    stats.generated += generated
+    stats.duplicates -= generated
+    stats.observe(frontier_size, reached, frontier)
+
+
+def _walk(parents, person):
+    """
+    Follows parent links back from `person` and returns the path from the
+    root as a list of (movie, person) pairs.
+    """
+    path = []
+    while parents[person] is not None:
+        movie, parent = parents[person]
+        path.append((movie, person))
+        person = parent
+    path.reverse()
+    return path
+
+
+def _join(forward, backward, person):
+    """
+    Joins the forward path to `person` with the backward path from `person`
+    to the target.
+    """
+    path = _walk(forward, person)
+    while backward[person] is not None:
+        movie, person = backward[person]
+        path.append((movie, person))
+    return path
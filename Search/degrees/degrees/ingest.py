@@ -0,0 +1,143 @@
+"""
+Parallel CSV ingestion for the degrees graph.
+
+Each CSV file is split into byte ranges that end on line boundaries and
+the ranges are parsed by a pool of worker processes. People and movies
+are parsed first; the star rows are then parsed against their ID
+numbering, so each worker hands back compact arrays of person and movie
+indexes that are simply concatenated. Rows naming an unknown person or
+movie are skipped, as in load_data.
+
+Rows must not contain embedded newlines, which holds for the IMDB exports.
+"""
+
+import csv
+import io
+import os
+
+from array import array
+from multiprocessing import Pool
+
+from graph import Graph, number_rows
+
+# Number of byte ranges each worker process gets per file
+CHUNKS_PER_PROCESS = 4
+
+# ID numbering of people and movies, set in star parsing workers
+person_index = None
+movie_index = None
+
+
+def chunk_ranges(path, chunks):
+    """
+    Returns the header row of a CSV file and up to `chunks` (start, end)
+    byte ranges that cover the rest of it and end on line boundaries.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header = next(csv.reader([f.readline().decode("utf-8")]))
+        bounds = [f.tell()]
+        step = max(1, (size - bounds[0]) // max(1, chunks))
+        while bounds[-1] < size:
+
+            # Step back one byte so a range already ending a line stays put
+            f.seek(min(bounds[-1] + step, size) - 1)
+            f.readline()
+            bounds.append(f.tell())
+    return header, list(zip(bounds, bounds[1:]))
+
+
+def _read_rows(path, start, end, columns):
+    """
+    Parses the CSV rows between two byte offsets, keeping only `columns`.
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+
+    # splitlines would also break quoted fields on characters such as
+    # U+2028, which csv only treats as data
+    return [tuple(row[i] for i in columns) for row in csv.reader(io.StringIO(text, newline="")) if row]
+
+
+def _parse_rows(task):
+    return _read_rows(*task)
+
+
+def _set_indexes(people, movies):
+    global person_index, movie_index
+    person_index = people
+    movie_index = movies
+
+
+def _parse_stars(task):
+    edge_people = array("i")
+    edge_movies = array("i")
+    for person_id, movie_id in _read_rows(*task):
+        person = person_index.get(person_id)
+        movie = movie_index.get(movie_id)
+        if person is None or movie is None:
+            continue
+        edge_people.append(person)
+        edge_movies.append(movie)
+    return edge_people, edge_movies
+
+
+def _tasks(path, fields, chunks):
+    header, ranges = chunk_ranges(path, chunks)
+    columns = [header.index(field) for field in fields]
+    return [(path, start, end, columns) for start, end in ranges]
+
+
+def load_graph(directory, processes=None, delta=None):
+    """
+    Builds a Graph from people.csv, movies.csv and stars.csv using
+    `processes` worker processes (default: one per CPU). With one process
+    the files are parsed in the calling process. `delta` holds (people,
+    movies, stars) rows, as read from the journal, to include after those
+    of the files.
+    """
+    processes = processes or os.cpu_count() or 1
+    chunks = processes * CHUNKS_PER_PROCESS
+    people_tasks = _tasks(f"{directory}/people.csv", ("id", "name", "birth"), chunks)
+    movie_tasks = _tasks(f"{directory}/movies.csv", ("id", "title", "year"), chunks)
+    star_tasks = _tasks(f"{directory}/stars.csv", ("person_id", "movie_id"), chunks)
+
+    if processes == 1:
+        parts = [_parse_rows(task) for task in people_tasks + movie_tasks]
+    else:
+        with Pool(processes) as pool:
+            parts = pool.map(_parse_rows, people_tasks + movie_tasks)
+    people = [row for part in parts[:len(people_tasks)] for row in part]
+    movies = [row for part in parts[len(people_tasks):] for row in part]
+    del parts
+    if delta is not None:
+        people.extend(delta[0])
+        movies.extend(delta[1])
+
+    people_by_id, people = number_rows(people)
+    movies_by_id, movies = number_rows(movies)
+
+    if processes == 1:
+        _set_indexes(people_by_id, movies_by_id)
+        try:
+            parts = [_parse_stars(task) for task in star_tasks]
+        finally:
+            _set_indexes(None, None)
+    else:
+        with Pool(processes, initializer=_set_indexes, initargs=(people_by_id, movies_by_id)) as pool:
+            parts = pool.map(_parse_stars, star_tasks)
+
+    # Merge the partial edge lists in file order
+    edge_people = array("i")
+    edge_movies = array("i")
+    for part_people, part_movies in parts:
+        edge_people.extend(part_people)
+        edge_movies.extend(part_movies)
+    if delta is not None:
+        for person_id, movie_id in delta[2]:
+            person, movie = people_by_id.get(person_id), movies_by_id.get(movie_id)
+            if person is not None and movie is not None:
+                edge_people.append(person)
+                edge_movies.append(movie)
+    return Graph.from_edges(people, movies, edge_people, edge_movies)
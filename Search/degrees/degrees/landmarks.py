@@ -0,0 +1,195 @@
+"""
+Landmark distance index for the degrees graph.
+
+A handful of landmark people are chosen and the BFS distance from each of
+them to every person is stored. By the triangle inequality, for any
+landmark L
+
+    |d(L, s) - d(L, t)| <= d(s, t) <= d(L, s) + d(L, t)
+
+which gives instant bounds on the degrees of separation between s and t,
+and an admissible heuristic for A* search (the "ALT" technique). A person
+reached by a landmark and a person it cannot reach are not connected.
+
+Usage: python landmarks.py directory [-k landmarks]
+"""
+
+import argparse
+import os
+
+from array import array
+
+from delta import JOURNAL
+from snapshot import SOURCES, read_sections, write_sections
+
+FILENAME = "degrees.landmarks"
+
+# Landmark distances change with added credits, so the saved index is
+# keyed on the journal as well as the CSV files
+INDEX_SOURCES = SOURCES + (JOURNAL,)
+
+# Distance stored for people a landmark cannot reach
+UNREACHABLE = 0xFFFF
+
+# Number of landmarks picked by default
+LANDMARKS = 8
+
+
+def distances_from(graph, source):
+    """
+    Returns an array of BFS distances (in people) from `source` to every
+    person, with UNREACHABLE for people in other components.
+    """
+    distances = array("H", [UNREACHABLE]) * graph.person_count
+    seen_movies = bytearray(graph.movie_count)
+    distances[source] = 0
+
+    frontier = [source]
+    depth = 0
+    while frontier:
+        depth += 1
+        layer = []
+        for person in frontier:
+            for movie in graph.movies_of(person):
+                if seen_movies[movie]:
+                    continue
+                seen_movies[movie] = 1
+                for other in graph.stars_of(movie):
+                    if distances[other] == UNREACHABLE:
+                        distances[other] = depth
+                        layer.append(other)
+        frontier = layer
+    return distances
+
+
+def _distance(distances, person):
+
+    # People added after the index was built are only in components that
+    # no landmark reaches, since otherwise the index would be dropped
+    return distances[person] if person < len(distances) else UNREACHABLE
+
+
+class LandmarkIndex():
+    """
+    BFS distances from a set of landmark people to every person.
+    """
+
+    def __init__(self, landmarks, distances):
+        self.landmarks = landmarks
+        self.distances = distances
+
+    @classmethod
+    def build(cls, graph, k=LANDMARKS):
+        """
+        Picks `k` landmarks by farthest-point selection, starting from the
+        person with the most movies, and computes their distances.
+        """
+        landmarks = array("i")
+        distances = []
+        if graph.person_count == 0:
+            return cls(landmarks, distances)
+
+        # Distance from each person to the nearest landmark chosen so far
+        nearest = None
+        candidate = max(
+            range(graph.person_count),
+            key=lambda person: len(graph.movies_of(person))
+        )
+        for _ in range(min(k, graph.person_count)):
+            landmarks.append(candidate)
+            distances.append(distances_from(graph, candidate))
+            if nearest is None:
+                nearest = array("H", distances[-1])
+            else:
+                nearest = array("H", map(min, nearest, distances[-1]))
+
+            # Next landmark: the reachable person farthest from all landmarks
+            farthest = max(
+                range(graph.person_count),
+                key=lambda person: nearest[person] if nearest[person] != UNREACHABLE else -1
+            )
+            if nearest[farthest] in (0, UNREACHABLE):
+                break
+            candidate = farthest
+        return cls(landmarks, distances)
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the degrees of separation between
+        two person indexes. Upper is None when no landmark reaches both,
+        and both are None when the people are known not to be connected.
+        """
+        if source == target:
+            return 0, 0
+        lower, upper = 1, None
+        for distances in self.distances:
+            to_source, to_target = _distance(distances, source), _distance(distances, target)
+            if (to_source == UNREACHABLE) != (to_target == UNREACHABLE):
+                return None, None
+            if to_source == UNREACHABLE:
+                continue
+            lower = max(lower, abs(to_source - to_target))
+            if upper is None or to_source + to_target < upper:
+                upper = to_source + to_target
+        return lower, upper
+
+    def heuristic(self, target):
+        """
+        Returns a function giving a lower bound on the distance from a
+        person to `target`, or None if the person cannot reach it.
+        """
+        columns = [(distances, _distance(distances, target)) for distances in self.distances]
+
+        def estimate(person):
+            best = 0
+            for distances, to_target in columns:
+                to_person = _distance(distances, person)
+                if (to_person == UNREACHABLE) != (to_target == UNREACHABLE):
+                    return None
+                if to_person != UNREACHABLE and abs(to_person - to_target) > best:
+                    best = abs(to_person - to_target)
+            return best
+
+        return estimate
+
+    def save(self, directory):
+        flat = array("H")
+        for distances in self.distances:
+            flat.extend(distances)
+        write_sections(
+            os.path.join(directory, FILENAME), directory,
+            {"landmarks": self.landmarks, "distances": flat}, INDEX_SOURCES
+        )
+
+    @classmethod
+    def load(cls, directory):
+        """
+        Returns the index saved for `directory`, or None if there is none
+        for the current CSV files and journal.
+        """
+        sections = read_sections(os.path.join(directory, FILENAME), directory, INDEX_SOURCES)
+        if sections is None:
+            return None
+        landmarks = sections["landmarks"]
+        flat = sections["distances"]
+        size = len(flat) // len(landmarks) if len(landmarks) else 0
+        distances = [flat[i * size:(i + 1) * size] for i in range(len(landmarks))]
+        return cls(landmarks, distances)
+
+
+def main():
+    import degrees
+
+    parser = argparse.ArgumentParser(description="Precompute the landmark index for degrees.")
+    parser.add_argument("directory")
+    parser.add_argument("-k", type=int, default=LANDMARKS, help="number of landmarks")
+    args = parser.parse_args()
+
+    degrees.load_data(args.directory, backend="csr")
+    index = degrees.load_landmarks(args.directory, k=args.k, rebuild=True)
+    for landmark in index.landmarks:
+        print(degrees.graph.person_ids[landmark], degrees.graph.person_names[landmark])
+
+
+if __name__ == "__main__":
+    main()
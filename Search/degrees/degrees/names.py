@@ -0,0 +1,326 @@
+"""
+Name index for degrees: prefix and fuzzy lookups of people by name.
+
+Names are compared in lowercase. Prefix lookups binary search a table of
+names sorted in that order. Fuzzy lookups use trigrams: a name within edit
+distance k of the query shares all but at most 3k of the query's distinct
+trigrams. The trigrams every name shares with the query are counted over
+the query's postings, and only names sharing enough of them are compared,
+using an edit distance computation that gives up early once the bound is
+exceeded. Bounds are tried from 0 up, so that close matches stop the
+search early. Queries too short to filter on trigrams, or whose postings
+are much larger, compare only the names of a length within k of theirs.
+
+Prefix and exact lookups take well under a millisecond. Fuzzy lookups
+that must look past exact matches do not: on 300k generated names they
+take about 8 ms at one edit and 30 ms at two, mostly spent counting the
+postings of the query's trigrams, so their cost grows with the number
+of names sharing those trigrams.
+
+Trigrams are hashed into a fixed number of buckets whose postings are kept
+in CSR arrays, so the index can be saved and memory-mapped like the graph.
+People appended to the tables after the index was built are few, and are
+compared one by one.
+"""
+
+import os
+import zlib
+
+from array import array
+from collections import Counter
+
+from graph import StringTable, csr_arrays
+from snapshot import read_sections, write_sections
+
+FILENAME = "degrees.names"
+
+# Number of trigram hash buckets (a power of two)
+BUCKETS = 1 << 18
+
+# Names are grouped by length up to this one; longer names share its group
+MAX_LENGTH = 64
+
+# Postings counted in about the time one edit distance takes to compute
+DISTANCE_COST = 32
+
+
+def normalize(name):
+    return name.lower()
+
+
+def trigrams(key):
+    """
+    Returns the distinct trigrams of a normalized name, padded so that the
+    start and end of the name form trigrams of their own.
+    """
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def bucket(gram):
+    return zlib.crc32(gram.encode("utf-8")) & (BUCKETS - 1)
+
+
+def bounded_distance(a, b, bound):
+    """
+    Returns the edit distance between two strings, or None if it exceeds
+    `bound`. Only cells within `bound` of the diagonal are computed, as
+    any path through the others costs more.
+    """
+    if abs(len(a) - len(b)) > bound:
+        return None
+    if a == b:
+        return 0
+
+    # A common prefix and suffix never change the distance
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(a) - start and end < len(b) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a, b = a[start:len(a) - end], b[start:len(b) - end]
+    if abs(len(a) - len(b)) > bound:
+        return None
+
+    # Each edit fixes at most one character missing from either string
+    common = sum(min(a.count(char), b.count(char)) for char in set(a))
+    if max(len(a), len(b)) - common > bound:
+        return None
+
+    # Cells off the band hold bound + 1, which is all that matters of them
+    over = bound + 1
+    previous = [min(j, over) for j in range(len(b) + 1)]
+    for i, char in enumerate(a, 1):
+        low, high = max(1, i - bound), min(len(b), i + bound)
+        current = [over] * (len(b) + 1)
+        if i <= bound:
+            current[0] = i
+        best = current[low - 1]
+        for j in range(low, high + 1):
+            value = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char != b[j - 1])
+            )
+            current[j] = value
+            if value < best:
+                best = value
+        if best > bound:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= bound else None
+
+
+class NameIndex():
+    """
+    Prefix and fuzzy name lookups over people tables.
+
+    `names` is a StringTable ordered by lowercase name; `ids` and `births`
+    are indexed the same way. The trigram postings hold positions in
+    `names.order`, one per distinct lowercase name. People appended to
+    the tables after `names.order` was built are scanned linearly.
+    The same positions are grouped by name length in `length_offsets`
+    and `length_postings`.
+    """
+
+    def __init__(self, names, ids, births, offsets, postings, length_offsets, length_postings):
+        self.names = names
+        self.ids = ids
+        self.births = births
+        self.offsets = offsets
+        self.postings = postings
+        self.length_offsets = length_offsets
+        self.length_postings = length_postings
+
+    @classmethod
+    def build(cls, names, ids, births):
+        buckets = array("i")
+        positions = array("i")
+        lengths = array("i")
+        distinct = array("i")
+        previous = None
+        for position, person in enumerate(names.order):
+            key = normalize(names[person])
+            if key == previous:
+                continue
+            previous = key
+            for gram in trigrams(key):
+                buckets.append(bucket(gram))
+                positions.append(position)
+            lengths.append(min(len(key), MAX_LENGTH))
+            distinct.append(position)
+        offsets, postings = csr_arrays(buckets, positions, BUCKETS)
+        length_offsets, length_postings = csr_arrays(lengths, distinct, MAX_LENGTH + 1)
+        return cls(names, ids, births, offsets, postings, length_offsets, length_postings)
+
+    @classmethod
+    def from_people(cls, people):
+        """
+        Builds an index over a dict of person_id: {"name", "birth", ...}.
+        """
+        ids = list(people)
+        return cls.build(
+            StringTable.build([people[person_id]["name"] for person_id in ids],
+                              ordered=True, key=str.lower),
+            ids,
+            [people[person_id]["birth"] for person_id in ids]
+        )
+
+    def add(self, person_id, name, birth):
+        """
+        Appends a person to tables built by from_people.
+        """
+        self.names.append(name)
+        self.ids.append(person_id)
+        self.births.append(birth)
+
+    def _appended(self):
+        return range(len(self.names.order), len(self.names))
+
+    def save(self, directory, journal=0):
+        """
+        Saves the index for `directory`, over tables that include the
+        first `journal` bytes of its journal.
+        """
+        write_sections(
+            os.path.join(directory, FILENAME), directory,
+            {
+                "offsets": self.offsets, "postings": self.postings,
+                "length_offsets": self.length_offsets, "length_postings": self.length_postings,
+                "journal": array("q", [journal])
+            }
+        )
+
+    @classmethod
+    def load(cls, directory, names, ids, births, journal=0):
+        """
+        Returns the index saved for `directory` over the given tables, or
+        None if there is none for the current CSV files and the first
+        `journal` bytes of the journal.
+        """
+        sections = read_sections(os.path.join(directory, FILENAME), directory)
+        if (sections is None or len(sections["offsets"]) != BUCKETS + 1
+                or len(sections.get("length_offsets", ())) != MAX_LENGTH + 2
+                or (sections["journal"][0] if "journal" in sections else 0) != journal):
+            return None
+        return cls(
+            names, ids, births, sections["offsets"], sections["postings"],
+            sections["length_offsets"], sections["length_postings"]
+        )
+
+    def _entry(self, person):
+        return self.ids[person], self.names[person], self.births[person]
+
+    def _group(self, position):
+        """
+        Yields the people whose name equals the one at `position` in order.
+        """
+        order = self.names.order
+        key = normalize(self.names[order[position]])
+        while position < len(order) and normalize(self.names[order[position]]) == key:
+            yield order[position]
+            position += 1
+
+    def prefix(self, prefix, limit=10):
+        """
+        Returns up to `limit` (person_id, name, birth) entries whose name
+        starts with `prefix`, ignoring case, in alphabetical order.
+        """
+        prefix = normalize(prefix.strip())
+        order = self.names.order
+        position = self.names.lower_bound(prefix)
+        found = []
+        while position < len(order) and len(found) < limit:
+            person = order[position]
+            if not normalize(self.names[person]).startswith(prefix):
+                break
+            found.append(self._entry(person))
+            position += 1
+
+        appended = [
+            self._entry(person) for person in self._appended()
+            if normalize(self.names[person]).startswith(prefix)
+        ]
+        if appended:
+            found = sorted(found + appended, key=lambda entry: normalize(entry[1]))[:limit]
+        return found
+
+    def _shared(self, grams):
+        """
+        Returns a Counter of the number of trigrams `grams` each name
+        position shares with them; hash collisions may only make it more.
+        """
+        offsets, postings = self.offsets, self.postings
+        counts = Counter()
+        for b in map(bucket, grams):
+            counts.update(postings[offsets[b]:offsets[b + 1]])
+        return counts
+
+    def fuzzy(self, query, max_distance=2, limit=10):
+        """
+        Returns up to `limit` (person_id, name, birth) entries whose name is
+        within `max_distance` edits of `query`, ignoring case, closest first.
+        Names with typos take milliseconds to find, see the module notes.
+        """
+        query = normalize(query.strip())
+        grams = trigrams(query)
+        shared = {}
+
+        # The closest names are found first: each bound only compares the
+        # names that may be within it, and `limit` people within a bound
+        # are closer than any name beyond it
+        found = []
+        for bound in range(max_distance + 1):
+            found = []
+            for _, _, appended, position in sorted(self._within(query, grams, bound, shared)):
+                for person in [position] if appended else self._group(position):
+                    found.append(self._entry(person))
+                    if len(found) == limit:
+                        return found
+        return found
+
+    def _within(self, query, grams, bound, shared):
+        """
+        Returns (distance, name, appended, position) for the names within
+        `bound` edits of a normalized query, at most one per name. The
+        trigram counts are computed once into `shared` for every bound.
+        """
+        order = self.names.order
+        required = len(grams) - 3 * bound
+        if bound == 0:
+
+            # Exact matches, by binary search
+            position = self.names.lower_bound(query)
+            found = position < len(order) and normalize(self.names[order[position]]) == query
+            candidates = [position] if found else []
+        else:
+
+            # Names of a length within bound of the query's, unless
+            # counting trigrams takes fewer steps; too short a query shares
+            # too few trigrams to filter on them
+            low = min(max(len(query) - bound, 0), MAX_LENGTH)
+            high = min(len(query) + bound, MAX_LENGTH)
+            start, end = self.length_offsets[low], self.length_offsets[high + 1]
+            postings = sum(self.offsets[b + 1] - self.offsets[b] for b in map(bucket, grams))
+            if required > 0 and ("counts" in shared or postings < (end - start) * DISTANCE_COST):
+                if "counts" not in shared:
+                    shared["counts"] = self._shared(grams)
+                candidates = [
+                    position for position, count in shared["counts"].items() if count >= required
+                ]
+            else:
+                candidates = self.length_postings[start:end]
+
+        matches = []
+        for position in candidates:
+            key = normalize(self.names[order[position]])
+            distance = bounded_distance(query, key, bound)
+            if distance is not None:
+                matches.append((distance, key, False, position))
+        for person in self._appended():
+            key = normalize(self.names[person])
+            distance = bounded_distance(query, key, bound)
+            if distance is not None:
+                matches.append((distance, key, True, person))
+        return matches
@@ -0,0 +1,363 @@
+"""
+Query server for degrees.
+
+Loads the graph once and answers degrees of separation queries over HTTP,
+on a TCP port or a Unix socket, so that clients do not pay for load_data
+on every run. Endpoints, all returning JSON:
+
+    GET /path?source=ID&target=ID     shortest path with names and titles
+    GET /degrees?source=ID&target=ID  degrees of separation only
+    GET /metrics                      counters and latency histograms
+    GET /health
+
+Query parameters may also be sent as a JSON object in a POST body. Path
+queries take optional `strategy`, `min_year` and `max_year` parameters,
+and `names=1` to pass names (matched like batch.py --names) instead of
+person IDs.
+
+Searches run in worker processes that memory-map the graph snapshot, so
+slow searches do not hold up the event loop or each other; pairs that
+are not connected are answered straight away from the component labels.
+Searches waiting for or running on a worker are bounded by --queue-size,
+beyond which the server answers 503, and answers taking longer than
+--timeout seconds are abandoned with 504. Searches that fail in a worker
+for any other reason are answered 500, keeping the connection open.
+
+Usage: python server.py directory [--host HOST] [--port PORT] [--unix PATH]
+                        [--workers N] [--queue-size N] [--timeout SECONDS]
+
+For example: curl 'http://127.0.0.1:8000/path?source=102&target=129'
+"""
+
+import argparse
+import asyncio
+import bisect
+import json
+import os
+import time
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+import batch
+import degrees
+
+STRATEGIES = ("bidirectional", "bipartite", "bfs", "astar")
+
+# Upper bounds of the latency histogram buckets, in seconds
+BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10)
+
+# Largest request body accepted, in bytes
+MAX_BODY = 64 * 1024
+
+# Seconds an idle keep-alive connection is held open
+IDLE_TIMEOUT = 30
+
+# Data directory of this process, set by init_worker
+data_directory = None
+
+
+def init_worker(directory, cache_bytes=0, processes=None):
+    global data_directory
+    data_directory = directory
+    batch.init_worker(directory, cache_bytes, processes=processes)
+
+
+def answer(query):
+    """
+    Returns (source, target, path) for a parsed path query, resolving
+    names first if the query holds names. Raises KeyError for an unknown
+    person.
+    """
+    source, target = query["source"], query["target"]
+    if query["names"]:
+        source, target = batch.resolve_name(source), batch.resolve_name(target)
+    if query["strategy"] == "astar" and degrees.landmarks is None:
+        degrees.load_landmarks(data_directory)
+    movies_allowed = None
+    if query["min_year"] is not None or query["max_year"] is not None:
+        movies_allowed = degrees.movie_filter(query["min_year"], query["max_year"])
+    return source, target, degrees.shortest_path(source, target, query["strategy"], movies_allowed)
+
+
+def parse_query(params):
+    """
+    Validates the parameters of a path query. Raises ValueError with a
+    message for the client if they are not valid.
+    """
+    source, target = params.get("source"), params.get("target")
+    if not source or not target:
+        raise ValueError("source and target are required")
+    strategy = params.get("strategy", "bidirectional")
+    if strategy not in STRATEGIES:
+        raise ValueError(f"unknown strategy: {strategy}")
+    query = {
+        "source": str(source),
+        "target": str(target),
+        "strategy": strategy,
+        "names": str(params.get("names", "")).lower() in ("1", "true", "yes")
+    }
+    for bound in ("min_year", "max_year"):
+        try:
+            query[bound] = None if params.get(bound) is None else int(params[bound])
+        except (TypeError, ValueError):
+            raise ValueError(f"{bound} must be a year")
+    return query
+
+
+class Histogram():
+    """
+    Counts of observed latencies in the BUCKETS ranges.
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def snapshot(self):
+        bounds = [str(bound) for bound in BUCKETS] + ["+Inf"]
+        return {"buckets": dict(zip(bounds, self.counts)), "count": self.count, "sum": self.total}
+
+
+class Server():
+    """
+    Answers HTTP queries against the loaded degrees data.
+
+    With `workers` of 0, searches run on a single thread of this process
+    instead of worker processes.
+    """
+
+    def __init__(self, directory, workers=1, queue_size=64, timeout=10.0, cache_bytes=0):
+        self.directory = directory
+        self.queue_size = queue_size
+        self.timeout = timeout
+        init_worker(directory, cache_bytes)
+        if workers > 0:
+            self.executor = ProcessPoolExecutor(
+                workers, initializer=init_worker, initargs=(directory, cache_bytes, 1)
+            )
+        else:
+            self.executor = ThreadPoolExecutor(1)
+
+        self.started = time.time()
+        self.pending = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.latency = {"path": Histogram(), "degrees": Histogram()}
+        self.statuses = {}
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def handle(self, reader, writer):
+        """
+        Serves the requests of one connection until it is closed.
+        """
+        try:
+            while True:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not line:
+                    break
+                try:
+                    method, target, version = line.decode("latin-1").split()
+                except ValueError:
+                    await self.respond(writer, 400, {"error": "malformed request line"}, False)
+                    break
+
+                # Headers
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+
+                # Body
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                if not 0 <= length <= MAX_BODY:
+                    await self.respond(writer, 413, {"error": "request body too large"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload = await self.dispatch(method, target, body)
+                await self.respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def dispatch(self, method, target, body):
+        """
+        Returns the (status, payload) answer to one request.
+        """
+        url = urlsplit(target)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        if body:
+            try:
+                fields = json.loads(body)
+            except ValueError:
+                fields = None
+            if not isinstance(fields, dict):
+                return 400, {"error": "body must be a JSON object"}
+            params.update(fields)
+
+        endpoint = url.path.strip("/")
+        if endpoint not in ("path", "degrees", "metrics", "health"):
+            return 404, {"error": f"no such endpoint: {url.path}"}
+        if method not in ("GET", "POST"):
+            return 405, {"error": f"method not allowed: {method}"}
+        if endpoint == "metrics":
+            return 200, self.metrics()
+        if endpoint == "health":
+            return 200, {"status": "ok"}
+
+        start = time.perf_counter()
+        status, payload = await self.query(params, endpoint == "degrees")
+        self.latency[endpoint].observe(time.perf_counter() - start)
+        key = f"{endpoint} {status}"
+        self.statuses[key] = self.statuses.get(key, 0) + 1
+        return status, payload
+
+    async def query(self, params, degrees_only):
+        try:
+            query = parse_query(params)
+        except ValueError as e:
+            return 400, {"error": str(e)}
+
+        # Pairs in different components need no search
+        if not query["names"]:
+            try:
+                if degrees.component(query["source"]) != degrees.component(query["target"]):
+                    return 200, self.result(query["source"], query["target"], None, degrees_only)
+            except KeyError as e:
+                return 404, {"error": f"unknown person: {e.args[0]}"}
+
+        if self.pending >= self.queue_size:
+            self.rejected += 1
+            return 503, {"error": "too many queries waiting"}
+        self.pending += 1
+        loop = asyncio.get_running_loop()
+        try:
+            future = self.executor.submit(answer, query)
+        except Exception as e:
+
+            # A broken worker pool takes no more work
+            self.pending -= 1
+            return 500, {"error": f"search failed: {e!r}"}
+
+        # Only count the query out once a worker is done with it
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._finished))
+        try:
+            source, target, path = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            return 504, {"error": f"no answer within {self.timeout} seconds"}
+        except KeyError as e:
+            return 404, {"error": f"unknown person: {e.args[0]}"}
+        except Exception as e:
+
+            # Any other failure in the worker, such as a worker dying or
+            # bad landmark data, fails this query but not the connection
+            return 500, {"error": f"search failed: {e!r}"}
+        return 200, self.result(source, target, path, degrees_only)
+
+    def _finished(self):
+        self.pending -= 1
+
+    def result(self, source, target, path, degrees_only):
+        payload = {"source": source, "target": target, "degrees": None if path is None else len(path)}
+        if not degrees_only:
+            payload["path"] = None if path is None else [
+                {
+                    "movie": movie,
+                    "title": degrees.movie_title(movie),
+                    "person": person,
+                    "name": degrees.person_name(person)
+                }
+                for movie, person in path
+            ]
+        return payload
+
+    def metrics(self):
+        return {
+            "uptime": time.time() - self.started,
+            "pending": self.pending,
+            "queue_size": self.queue_size,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "responses": dict(self.statuses),
+            "latency": {endpoint: histogram.snapshot() for endpoint, histogram in self.latency.items()}
+        }
+
+
+async def serve(server, host="127.0.0.1", port=8000, unix=None):
+    if unix is not None:
+        listener = await asyncio.start_unix_server(server.handle, unix)
+    else:
+        listener = await asyncio.start_server(server.handle, host, port)
+    async with listener:
+        await listener.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve degrees of separation queries over HTTP.")
+    parser.add_argument("directory")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--unix", help="listen on this Unix socket instead of a TCP port")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="search processes (default: one per CPU; 0 searches on a thread)")
+    parser.add_argument("--queue-size", type=int, default=64,
+                        help="searches waiting or running before new ones are refused")
+    parser.add_argument("--timeout", type=float, default=10.0,
+                        help="seconds before a query is answered with 504")
+    parser.add_argument("--source-cache-mb", type=float, default=0,
+                        help="per-worker memory for cached BFS trees of repeated sources")
+    args = parser.parse_args()
+
+    print("Loading data...")
+    server = Server(args.directory, args.workers, args.queue_size, args.timeout,
+                    int(args.source_cache_mb * 1024 * 1024))
+    print(f"Listening on {args.unix or f'http://{args.host}:{args.port}'}")
+    try:
+        asyncio.run(serve(server, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Binary snapshots of the degrees graph.
+
+A snapshot is written next to the CSV files and memory-mapped by later
+runs, so the graph arrays are read straight from the page cache (and
+shared between processes) instead of being parsed from CSV again.
+
+Layout:
+
+    magic (8 bytes) | version (uint32) | header size (uint32) | JSON header | sections
+
+The header records the size and mtime of each source CSV, the byte order
+and, for every section, its offset, length and array typecode. Sections
+start on 8-byte boundaries. A snapshot written by another version, on a
+machine with another byte order, or from CSV files that have changed
+since, is ignored. Other indexes over the graph are saved in the same
+format with write_sections.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+
+from array import array
+
+from graph import Graph
+
+MAGIC = b"DEGSNAP\0"
+VERSION = 2
+FILENAME = "degrees.snapshot"
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+PREAMBLE = struct.Struct("<8sII")
+ALIGNMENT = 8
+
+
+def snapshot_path(directory):
+    return os.path.join(directory, FILENAME)
+
+
+def source_key(directory, sources=SOURCES):
+    """
+    Returns the [size, mtime_ns] of each source file, keyed by file name,
+    or None for a source file that does not exist.
+    """
+    key = {}
+    for name in sources:
+        try:
+            stat = os.stat(os.path.join(directory, name))
+        except FileNotFoundError:
+            key[name] = None
+        else:
+            key[name] = [stat.st_size, stat.st_mtime_ns]
+    return key
+
+
+def _typecode(section):
+    if isinstance(section, memoryview):
+        return section.format
+    return getattr(section, "typecode", "B")
+
+
+def _padding(position):
+    return -position % ALIGNMENT
+
+
+def write_sections(path, directory, sections, sources=SOURCES):
+    """
+    Writes named arrays to `path` in snapshot format, keyed on the
+    `sources` files of `directory`. The file is replaced atomically.
+    """
+
+    # Lay out sections after a header whose size does not depend on offsets
+    layout = {}
+    position = 0
+    for name, section in sections.items():
+        view = memoryview(section)
+        layout[name] = [position, view.nbytes, _typecode(section)]
+        position += view.nbytes + _padding(view.nbytes)
+    header = json.dumps({
+        "byteorder": sys.byteorder,
+        "sources": source_key(directory, sources),
+        "sections": layout
+    }).encode("utf-8")
+    start = PREAMBLE.size + len(header)
+    start += _padding(start)
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))
+            f.write(header)
+            f.write(bytes(start - PREAMBLE.size - len(header)))
+            for name, section in sections.items():
+                nbytes = layout[name][1]
+                f.write(memoryview(section).cast("B"))
+                f.write(bytes(_padding(nbytes)))
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def read_sections(path, directory, sources=SOURCES):
+    """
+    Memory-maps a file written by write_sections and returns its sections
+    as memoryviews keyed by name, or None if the file is missing, was
+    written by another version, or the `sources` files of `directory`
+    changed.
+    """
+    try:
+        with open(path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        magic, version, size = PREAMBLE.unpack_from(mapping)
+        if magic != MAGIC or version != VERSION:
+            return None
+        header = json.loads(mapping[PREAMBLE.size:PREAMBLE.size + size])
+        if header["byteorder"] != sys.byteorder or header["sources"] != source_key(directory, sources):
+            return None
+    except (struct.error, ValueError, KeyError, OSError):
+        return None
+
+    start = PREAMBLE.size + size
+    start += _padding(start)
+    view = memoryview(mapping)
+    sections = {}
+    for name, (offset, nbytes, typecode) in header["sections"].items():
+        section = view[start + offset:start + offset + nbytes]
+        sections[name] = section if typecode == "B" else section.cast(typecode)
+    return sections
+
+
+def write_snapshot(directory, graph, journal=0):
+    """
+    Writes `graph` to the snapshot file of `directory`, replacing any
+    existing snapshot atomically. `journal` is the number of bytes of the
+    journal whose rows the graph includes.
+    """
+    sections = graph.sections()
+    sections["journal"] = array("q", [journal])
+    write_sections(snapshot_path(directory), directory, sections)
+
+
+def read_snapshot(directory):
+    """
+    Returns (graph, journal) for the snapshot of `directory`, where
+    `journal` is the number of bytes of the journal folded into the
+    graph, or (None, 0) if there is no snapshot or it is out of date.
+    """
+    sections = read_sections(snapshot_path(directory), directory)
+    if sections is None:
+        return None, 0
+    journal = sections.get("journal")
+    return Graph.from_sections(sections), journal[0] if journal is not None else 0
@@ -0,0 +1,119 @@
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+
+import degrees
+import delta
+import names
+
+DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "small")
+
+class Degrees_Test(unittest.TestCase):
+
+    backend = "dict"
+
+    @classmethod
+    def setUpClass(cls):
+        degrees.load_data(DIRECTORY, backend=cls.backend, cache=False, processes=1)
+        with open(os.path.join(DIRECTORY, "people.csv"), encoding="utf-8") as f:
+            cls.people = [row["id"] for row in csv.DictReader(f)]
+
+    def assertValidPath(self, source, target, path):
+        person = source
+        for movie_id, person_id in path:
+            self.assertIn((movie_id, person_id), degrees.neighbors_for_person(person))
+            person = person_id
+        self.assertEqual(person, target)
+
+    def assertMatchesBfs(self, strategy):
+        for source in self.people:
+            for target in self.people:
+                expected = degrees.shortest_path(source, target, "bfs")
+                path = degrees.shortest_path(source, target, strategy)
+                if expected is None:
+                    self.assertIsNone(path, (source, target))
+                    continue
+                self.assertEqual(len(path), len(expected), (source, target))
+                self.assertValidPath(source, target, path)
+
+    # Search Strategy Tests
+    def test_bidirectional_matches_bfs(self):
+        self.assertMatchesBfs("bidirectional")
+
+    def test_bipartite_matches_bfs(self):
+        self.assertMatchesBfs("bipartite")
+
+    def test_same_person(self):
+        self.assertEqual(degrees.shortest_path("102", "102"), [])
+
+    # Lookup Tests
+    def test_unknown_ids_raise_key_error(self):
+        for lookup in (degrees.neighbors_for_person, degrees.person_name, degrees.person_birth):
+            with self.assertRaises(KeyError):
+                lookup("0")
+        with self.assertRaises(KeyError):
+            degrees.movie_title("0")
+
+    def test_lookups(self):
+        self.assertEqual(degrees.person_name("102"), "Kevin Bacon")
+        self.assertEqual(degrees.person_birth("102"), "1958")
+        self.assertEqual(degrees.movie_title("104257"), "A Few Good Men")
+
+    # Name Index Tests
+    def test_match_name_typo(self):
+        self.assertEqual(degrees.match_name("Kevn Bacon")[0], ("102", "Kevin Bacon", "1958"))
+        self.assertEqual(degrees.match_name("kevin bacon", max_distance=0), [("102", "Kevin Bacon", "1958")])
+
+    def test_match_name_longer_than_indexed_lengths(self):
+        self.assertEqual(degrees.match_name("a" * (names.MAX_LENGTH + 3)), [])
+        self.assertEqual(degrees.match_name("Kevin Bacon" * 10), [])
+
+    # Journal Tests
+    def test_journal_replay_and_compaction(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for name in ("people.csv", "movies.csv", "stars.csv"):
+                shutil.copy(os.path.join(DIRECTORY, name), directory)
+            degrees.load_data(directory, backend=self.backend, processes=1)
+            degrees.apply_delta(
+                [("900001", "Newt Person", "1990")], [("900002", "New Movie", "2020")],
+                [("900001", "900002"), ("102", "900002")], directory=directory
+            )
+
+            for compact in (False, True):
+                degrees.load_data(directory, backend=self.backend, processes=1, compact=compact)
+                self.assertEqual(degrees.person_name("900001"), "Newt Person")
+                self.assertEqual(degrees.movie_title("900002"), "New Movie")
+                self.assertEqual(degrees.shortest_path("102", "900001"), [("900002", "900001")])
+                self.assertEqual(degrees.match_name("Newt Persn")[0], ("900001", "Newt Person", "1990"))
+                # Only replayed rows are scanned one by one
+                replayed = [] if self.backend == "dict" or compact else [len(degrees.name_index.names) - 1]
+                self.assertEqual(list(degrees.name_index._appended()), replayed)
+
+            # Compacted, later loads replay nothing
+            degrees.load_data(directory, backend=self.backend, processes=1)
+            self.assertEqual(list(degrees.name_index._appended()), [])
+        degrees.load_data(DIRECTORY, backend=self.backend, cache=False, processes=1)
+
+    def test_journal_tail(self):
+        with tempfile.TemporaryDirectory() as directory:
+            delta.append_journal(directory, [("1", "A", "")], [("2", "B", "")], [("1", "2")])
+            end = delta.journal_size(directory)
+            delta.append_journal(directory, [("3", "C", "")])
+            self.assertEqual(
+                delta.read_journal(directory, 0, end),
+                ([("1", "A", "")], [("2", "B", "")], [("1", "2")])
+            )
+            self.assertEqual(delta.read_journal(directory, end), ([("3", "C", "")], [], []))
+            with open(delta.journal_path(directory), "a") as f:
+                f.write("person,4,D")
+            size = os.path.getsize(delta.journal_path(directory))
+            self.assertEqual(delta.journal_size(directory), size - len("person,4,D"))
+
+class Degrees_CSR_Test(Degrees_Test):
+
+    backend = "csr"
+
+if __name__ == '__main__':
+    unittest.main()
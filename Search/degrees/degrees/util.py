@@ -1,38 +1,12 @@
-class Node():
-    def __init__(self, state, parent, action):
-        self.state = state
-        self.parent = parent
-        self.action = action
+"""
+Search nodes and frontiers for degrees, from the search toolkit shared by
+the Search projects (Search/search.py).
+"""
 
+import os
+import sys
 
-class StackFrontier():
-    def __init__(self):
-        self.frontier = []
+# The toolkit lives two directories up, next to maze.py
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir))
 
-    def add(self, node):
-        self.frontier.append(node)
-
-    def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
-
-    def empty(self):
-        return len(self.frontier) == 0
-
-    def remove(self):
-        if self.empty():
-            raise Exception("empty frontier")
-        else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
-            return node
-
-
-class QueueFrontier(StackFrontier):
-
-    def remove(self):
-        if self.empty():
-            raise Exception("empty frontier")
-        else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
-            return node
+from search import Node, PriorityFrontier, QueueFrontier, SearchStats, StackFrontier, search
@@ -0,0 +1,182 @@
+"""
+Goal-rooted distance fields for mazes with many start points.
+
+One breadth-first flood from the goal of a Grid gives every open cell its
+distance to the goal and the move that leads one step closer to it. The
+shortest path from any start is then a walk along those moves, with no
+search at all, so thousands of agents heading for the same goal cost one
+flood plus the length of their paths. Maze.distance_field builds one for
+a Maze.
+
+Fields can be saved next to the maze and loaded again; a saved field
+records a checksum of the walls it was built for.
+"""
+
+import os
+import struct
+import sys
+import zlib
+
+from array import array
+
+from grid import ACTIONS
+
+MAGIC = b"MAZEFLD\0"
+VERSION = 1
+
+# Magic, version, height, width, goal row and column, checksum of the
+# walls and whether the distances are stored big-endian
+HEADER = struct.Struct("<8sIIIIIIB")
+
+# Value of moves for the goal cell
+GOAL = 255
+
+
+class DistanceField():
+    """
+    Distances to the goal and next moves for every cell of a maze, in the
+    flat bordered layout of Grid: distances[index] is the number of moves
+    from a cell to the goal (-1 if it cannot reach it) and moves[index]
+    is 1 + the index in ACTIONS of the move to take (0 if none).
+    """
+
+    def __init__(self, height, width, goal, distances, moves, checksum):
+        self.height = height
+        self.width = width
+        self.stride = width + 2
+        self.goal = goal
+        self.distances = distances
+        self.moves = moves
+        self.checksum = checksum
+        self.offsets = (-self.stride, self.stride, -1, 1)
+
+    @classmethod
+    def build(cls, grid):
+        """
+        Floods the maze of a Grid breadth-first from its goal.
+        """
+        walls = grid.walls
+        distances = array("i", [-1]) * len(walls)
+        moves = bytearray(len(walls))
+        goal = grid.index(grid.goal)
+        distances[goal] = 0
+        moves[goal] = GOAL
+
+        # A cell reached through offset o from a cell closer to the goal
+        # heads back with the opposite move
+        steps = tuple(zip((2, 1, 4, 3), grid.offsets))
+        frontier = [goal]
+        depth = 0
+        while frontier:
+            depth += 1
+            layer = []
+            for index in frontier:
+                for move, offset in steps:
+                    neighbor = index + offset
+                    if not walls[neighbor] and not moves[neighbor]:
+                        moves[neighbor] = move
+                        distances[neighbor] = depth
+                        layer.append(neighbor)
+            frontier = layer
+        return cls(grid.height, grid.width, grid.goal, distances, moves, zlib.crc32(walls))
+
+    def index(self, cell):
+        return (cell[0] + 1) * self.stride + cell[1] + 1
+
+    def cell(self, index):
+        row, column = divmod(index, self.stride)
+        return row - 1, column - 1
+
+    def distance(self, cell):
+        """
+        Returns the number of moves from a cell to the goal, or None if
+        the cell is a wall or cannot reach the goal.
+        """
+        if not (0 <= cell[0] < self.height and 0 <= cell[1] < self.width):
+            return None
+        distance = self.distances[self.index(cell)]
+        return distance if distance >= 0 else None
+
+    def path(self, cell):
+        """
+        Returns the (actions, cells) of a shortest path from a cell to the
+        goal, like Maze.solution, or None if there is none.
+        """
+        return self.paths([cell])[0]
+
+    def paths(self, starts):
+        """
+        Returns the path from each of many start cells, or None for those
+        that cannot reach the goal.
+        """
+        moves, offsets, stride = self.moves, self.offsets, self.stride
+        goal = self.index(self.goal)
+        found = []
+        for start in starts:
+            if not (0 <= start[0] < self.height and 0 <= start[1] < self.width):
+                found.append(None)
+                continue
+            index = self.index(start)
+            if not moves[index]:
+                found.append(None)
+                continue
+            actions, cells = [], []
+            while index != goal:
+                move = moves[index] - 1
+                index += offsets[move]
+                actions.append(ACTIONS[move])
+                row, column = divmod(index, stride)
+                cells.append((row - 1, column - 1))
+            found.append((actions, cells))
+        return found
+
+    def matches(self, grid):
+        """
+        Returns whether the field was built for the maze of a Grid.
+        """
+        return (
+            (grid.height, grid.width, grid.goal) == (self.height, self.width, self.goal)
+            and zlib.crc32(grid.walls) == self.checksum
+        )
+
+    def save(self, filename):
+        temporary = f"{filename}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(HEADER.pack(
+                MAGIC, VERSION, self.height, self.width, *self.goal,
+                self.checksum, sys.byteorder == "big"
+            ))
+            f.write(self.moves)
+            self.distances.tofile(f)
+        os.replace(temporary, filename)
+
+    @classmethod
+    def load(cls, filename, grid=None):
+        """
+        Reads a field saved by save. Raises ValueError if the file is not
+        a distance field, or if `grid` is given and the field was built
+        for another maze.
+        """
+        with open(filename, "rb") as f:
+            header = f.read(HEADER.size)
+            if len(header) != HEADER.size:
+                raise ValueError(f"not a distance field: {filename}")
+            magic, version, height, width, goal_row, goal_column, checksum, big = HEADER.unpack(header)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"not a distance field: {filename}")
+            size = (height + 2) * (width + 2)
+            moves = bytearray(size)
+            distances = array("i")
+            try:
+                if f.readinto(moves) != size:
+                    raise EOFError
+                distances.fromfile(f, size)
+            except EOFError:
+                raise ValueError(f"truncated distance field: {filename}")
+        if big != (sys.byteorder == "big"):
+            distances.byteswap()
+
+        field = cls(height, width, (goal_row, goal_column), distances, moves, checksum)
+        if grid is not None and not field.matches(grid):
+            raise ValueError(f"distance field {filename} is for another maze")
+        return field
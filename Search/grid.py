@@ -0,0 +1,461 @@
+"""
+Array-backed mazes for mazes too big for Maze.
+
+A Grid keeps the same maze as Maze in flat arrays instead of lists of
+lists and Node objects:
+
+    walls     one byte per cell, 1 for a wall, in row-major order with a
+              border of walls around the maze, so that the neighbors of
+              every open cell are at fixed offsets and need no bounds
+              checks
+    came      one byte per cell, giving the move that first reached the
+              cell (0 if unreached): both the visited flags and, since a
+              move determines the cell it came from, the parent pointers
+    explored  one byte per cell, 1 once the cell has been expanded
+
+States are integer indexes into these arrays. A 5000x5000 maze takes
+about 75 MB to solve breadth-first (100 MB more for A* path costs), where
+Maze needs several gigabytes.
+
+The file format, strategies and results match Maze: solution holds the
+(actions, cells) of the path found, in (row, column) cells.
+"""
+
+import heapq
+import mmap
+
+from array import array
+from collections import deque
+from contextlib import nullcontext
+
+from render import render
+from search import STRATEGIES
+
+ACTIONS = ("up", "down", "left", "right")
+
+# Strategies for mazes: those of the search toolkit, plus jump point search
+MAZE_STRATEGIES = STRATEGIES + ("jps",)
+
+# Value of came for the start cell
+START = 255
+
+# Maps maze file bytes to wall flags: only spaces, A and B are open
+WALLS = bytes(0 if chr(byte) in " AB" else 1 for byte in range(256))
+
+# Bytes of the maze file kept mapped in memory behind the current line
+WINDOW = 4 * 1024 * 1024
+
+
+def read_maze(filename):
+    """
+    Reads a maze file through a memory map, without holding its contents
+    in memory. Returns (height, width, walls, start, goal) as taken by
+    Grid.
+
+    One pass finds the line boundaries, then a second builds the walls
+    row by row and finds A and B on the way. Pages of the file are
+    released behind each pass, so peak memory stays close to the size of
+    the walls rather than that of the file.
+    """
+    with open(filename, "rb") as f:
+        try:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+
+            # Empty files cannot be mapped
+            raise Exception("maze must have exactly one start point")
+
+    with mapping:
+
+        # Line boundaries, and the width of the widest line in characters
+        ends = array("q")
+        width = 0
+        position = released = 0
+        while position < len(mapping):
+            end = mapping.find(b"\n", position)
+            if end == -1:
+                end = len(mapping)
+            ends.append(end)
+            line = _line(mapping, position, end)
+            width = max(width, len(line))
+            position = end + 1
+            released = _release(mapping, released, position)
+        _release(mapping, released, len(mapping), force=True)
+
+        height = len(ends)
+        stride = width + 2
+        walls = bytearray(b"\x01") * ((height + 2) * stride)
+        starts = goals = 0
+        start = goal = None
+        position = released = 0
+        for i, end in enumerate(ends):
+            line = _line(mapping, position, end)
+            position = end + 1
+            released = _release(mapping, released, position)
+
+            # Any character but a space, A or B is a wall, and cells past
+            # the end of a short line are open
+            base = (i + 1) * stride + 1
+            walls[base:base + len(line)] = line.translate(WALLS)
+            walls[base + len(line):base + width] = bytes(width - len(line))
+            if b"A" in line:
+                starts += line.count(b"A")
+                start = (i, line.index(b"A"))
+            if b"B" in line:
+                goals += line.count(b"B")
+                goal = (i, line.index(b"B"))
+
+    # Validate start and goal
+    if starts != 1:
+        raise Exception("maze must have exactly one start point")
+    if goals != 1:
+        raise Exception("maze must have exactly one goal")
+    return height, width, walls, start, goal
+
+
+def _line(mapping, start, end):
+    """
+    Returns a line of the file as one byte per character, without its
+    line ending.
+    """
+    line = mapping[start:end]
+    if line.endswith(b"\r"):
+        line = line[:-1]
+
+    # Characters outside ASCII are all walls, whatever their encoding
+    if not line.isascii():
+        line = line.decode("utf-8", "replace").encode("ascii", "replace")
+    return line
+
+
+def _release(mapping, released, position, force=False):
+    """
+    Drops the pages of the file before `position` from memory once a
+    window of them has been read. Returns the new released offset.
+    """
+    if not force and position - released < WINDOW or not hasattr(mmap, "MADV_DONTNEED"):
+        return released
+    end = position // mmap.PAGESIZE * mmap.PAGESIZE
+    if end > released:
+        mapping.madvise(mmap.MADV_DONTNEED, released, end - released)
+    return max(end, released)
+
+
+def _record(stats, walls, index, moves, added, frontier, expanded):
+    """
+    Counts one expansion of the cell at `index` in a search.SearchStats:
+    its open neighbors not added to the frontier were already reached.
+    """
+    successors = sum(not walls[index + move[1]] for move in moves)
+    stats.expanded += 1
+    stats.generated += added
+    stats.duplicates += successors - added
+    stats.observe(len(frontier), expanded, frontier)
+
+
+class Grid():
+
+    def __init__(self, height, width, walls, start, goal):
+        self.height = height
+        self.width = width
+
+        # Row length including the border columns
+        self.stride = width + 2
+        self.walls = walls
+        self.start = start
+        self.goal = goal
+
+        # Offset of the cell each action moves to, in the order of ACTIONS
+        self.offsets = (-self.stride, self.stride, -1, 1)
+
+        self.solution = None
+        self.came = None
+        self.explored = None
+        self.num_explored = 0
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Reads a maze file in the format read by Maze, see read_maze.
+        """
+        return cls(*read_maze(filename))
+
+    def index(self, cell):
+        return (cell[0] + 1) * self.stride + cell[1] + 1
+
+    def cell(self, index):
+        row, column = divmod(index, self.stride)
+        return row - 1, column - 1
+
+    def is_wall(self, cell):
+        return bool(self.walls[self.index(cell)])
+
+    def neighbors(self, index):
+        """
+        Returns the (action, index) pairs of the open cells next to a cell.
+        """
+        walls = self.walls
+        return [
+            (action, index + offset)
+            for action, offset in zip(ACTIONS, self.offsets)
+            if not walls[index + offset]
+        ]
+
+    def solve(self, strategy="bfs", stats=None):
+        """
+        Finds a solution to the maze, if one exists, with the strategies of
+        Maze.solve: "dfs", "bfs", "greedy", "astar" or "jps". Pass a
+        search.SearchStats as `stats` to record what Maze.solve records.
+        """
+        if strategy not in MAZE_STRATEGIES:
+            raise ValueError(f"unknown search strategy: {strategy}")
+        size = len(self.walls)
+        self.came = bytearray(size)
+        self.explored = bytearray(size)
+        start, goal = self.index(self.start), self.index(self.goal)
+        self.came[start] = START
+
+        with stats.phase("search") if stats is not None else nullcontext():
+            if strategy in ("dfs", "bfs"):
+                expanded = self._search_queue(start, goal, strategy == "dfs", stats)
+            elif strategy == "jps":
+                expanded = self._search_jump(start, goal, stats)
+            else:
+                expanded = self._search_heap(start, goal, strategy == "astar", stats)
+        if expanded is None:
+            raise Exception("no solution")
+
+        # The goal was removed from the frontier as well
+        self.num_explored = expanded + 1
+
+        # Follow the moves back from the goal
+        actions, cells = [], []
+        index = goal
+        while self.came[index] != START:
+            move = self.came[index] - 1
+            actions.append(ACTIONS[move])
+            cells.append(self.cell(index))
+            index -= self.offsets[move]
+        actions.reverse()
+        cells.reverse()
+        self.solution = (actions, cells)
+
+    def output_image(self, filename, show_solution=True, show_explored=False, cell_size=50, cell_border=2,
+                     downsample=1, tile=None):
+        """
+        Draws the maze like Maze.output_image, see render.render.
+        """
+        return render(self, filename, show_solution, show_explored, cell_size, cell_border, downsample, tile)
+
+    def _search_queue(self, start, goal, depth_first, stats=None):
+        """
+        Breadth- or depth-first search. Returns the number of cells
+        expanded before the goal was removed, or None if it is unreachable.
+        """
+        walls, came, explored = self.walls, self.came, self.explored
+        moves = tuple(enumerate(self.offsets, 1))
+        frontier = deque([start])
+        remove = frontier.pop if depth_first else frontier.popleft
+        add = frontier.append
+        expanded = 0
+        while frontier:
+            index = remove()
+            if index == goal:
+                return expanded
+            explored[index] = 1
+            expanded += 1
+            size = len(frontier)
+            for move, offset in moves:
+                neighbor = index + offset
+
+                # A cell already reached is in the frontier or explored
+                if not walls[neighbor] and not came[neighbor]:
+                    came[neighbor] = move
+                    add(neighbor)
+            if stats is not None:
+                _record(stats, walls, index, moves, len(frontier) - size, frontier, expanded)
+        return None
+
+    def _search_heap(self, start, goal, astar, stats=None):
+        """
+        Greedy best-first or A* search by Manhattan distance to the goal,
+        breaking ties like search.PriorityFrontier. Returns the number of
+        cells expanded before the goal was removed, or None if it is
+        unreachable.
+        """
+        walls, came, explored = self.walls, self.came, self.explored
+        stride = self.stride
+        goal_row, goal_column = divmod(goal, stride)
+        moves = tuple(zip(range(1, 5), self.offsets, (-1, 1, 0, 0), (0, 0, -1, 1)))
+
+        # Path cost of each reached cell, for A* only
+        costs = array("i", [0]) * len(walls) if astar else None
+
+        # A* orders cells by estimated total, then by deepest first, packed
+        # into one integer as total * scale - cost
+        scale = len(walls)
+
+        # Heap of (priority, insertion count, cost, index); a cell whose
+        # cost was lowered since an entry was pushed leaves a stale entry
+        row, column = divmod(start, stride)
+        estimate = abs(row - goal_row) + abs(column - goal_column)
+        heap = [(estimate * scale if astar else estimate, 0, 0, start)]
+        count = 0
+        expanded = 0
+        while heap:
+            _, _, cost, index = heapq.heappop(heap)
+            if explored[index] or astar and cost > costs[index]:
+                if stats is not None:
+                    stats.duplicates += 1
+                continue
+            if index == goal:
+                return expanded
+            explored[index] = 1
+            expanded += 1
+            pushed = count
+            row, column = divmod(index, stride)
+            cost += 1
+            for move, offset, row_step, column_step in moves:
+                neighbor = index + offset
+                if walls[neighbor] or explored[neighbor]:
+                    continue
+                estimate = abs(row + row_step - goal_row) + abs(column + column_step - goal_column)
+                if astar:
+                    if came[neighbor] and costs[neighbor] <= cost:
+                        continue
+                    costs[neighbor] = cost
+                    priority = (cost + estimate) * scale - cost
+                elif came[neighbor]:
+                    continue
+                else:
+                    priority = estimate
+                came[neighbor] = move
+                count += 1
+                heapq.heappush(heap, (priority, count, cost, neighbor))
+            if stats is not None:
+                _record(stats, walls, index, moves, count - pushed, heap, expanded)
+        return None
+
+    def _search_jump(self, start, goal, stats=None):
+        """
+        Jump point search: A* by Manhattan distance over jump points only.
+        Of the many shortest paths across open areas, it only follows
+        those that go straight until a wall or an obstacle corner forces
+        a turn, or until a turn could lead to one, so cells in between
+        are scanned but never added to the open list or expanded. Only
+        expanded jump points are marked explored, and came is filled in
+        along the path found. Returns the number of jump points expanded
+        before the goal was removed, or None if it is unreachable.
+        """
+        walls, explored = self.walls, self.explored
+        stride = self.stride
+        goal_row, goal_column = divmod(goal, stride)
+        scale = len(walls)
+        jump = self._jump
+
+        # Cost, jump point it was reached from and direction of the move
+        # that reached each jump point
+        costs = {start: 0}
+        parents = {start: None}
+        directions = {start: 0}
+
+        row, column = divmod(start, stride)
+        heap = [((abs(row - goal_row) + abs(column - goal_column)) * scale, 0, 0, start)]
+        count = 0
+        expanded = 0
+        while heap:
+            _, _, cost, index = heapq.heappop(heap)
+            if explored[index] or cost > costs[index]:
+                if stats is not None:
+                    stats.duplicates += 1
+                continue
+            if index == goal:
+                self._fill_came(parents, goal)
+                return expanded
+            explored[index] = 1
+            expanded += 1
+            pushed = count
+            found = 0
+
+            # Keep going the same way or turn; only the start goes back
+            direction = directions[index]
+            if direction == 0:
+                steps = (-stride, stride, -1, 1)
+            elif direction in (-1, 1):
+                steps = (direction, -stride, stride)
+            else:
+                steps = (direction, -1, 1)
+            for step in steps:
+                point = jump(index, step, goal)
+                if point is None:
+                    continue
+                found += 1
+                if explored[point]:
+                    continue
+                distance = abs(point - index)
+                total = cost + (distance if step in (-1, 1) else distance // stride)
+                if point in costs and costs[point] <= total:
+                    continue
+                costs[point] = total
+                parents[point] = index
+                directions[point] = step
+                row, column = divmod(point, stride)
+                estimate = abs(row - goal_row) + abs(column - goal_column)
+                count += 1
+                heapq.heappush(heap, ((total + estimate) * scale - total, count, total, point))
+            if stats is not None:
+                stats.expanded += 1
+                stats.generated += count - pushed
+                stats.duplicates += found - (count - pushed)
+                stats.observe(len(heap), len(costs), heap)
+        return None
+
+    def _jump(self, index, step, goal):
+        """
+        Moves from a cell in a straight line by `step` until it reaches a
+        jump point, and returns it, or None if it runs into a wall first.
+        Jump points are the goal and cells next to an obstacle corner,
+        where a shortest path may have to turn; moving vertically, cells
+        from which a horizontal scan finds a jump point are jump points
+        too.
+        """
+        walls, stride = self.walls, self.stride
+        if step in (-1, 1):
+            while True:
+                index += step
+                if walls[index]:
+                    return None
+                if index == goal:
+                    return index
+                up, down = index - stride, index + stride
+                if not walls[up] and walls[up - step] or not walls[down] and walls[down - step]:
+                    return index
+
+        while True:
+            index += step
+            if walls[index]:
+                return None
+            if index == goal:
+                return index
+            left, right = index - 1, index + 1
+            if not walls[left] and walls[left - step] or not walls[right] and walls[right - step]:
+                return index
+            if self._jump(index, -1, goal) is not None or self._jump(index, 1, goal) is not None:
+                return index
+
+    def _fill_came(self, parents, goal):
+        """
+        Sets came for every cell on the straight segments between the jump
+        points leading to the goal.
+        """
+        came, offsets = self.came, self.offsets
+        index = goal
+        while parents[index] is not None:
+            parent = parents[index]
+            difference = index - parent
+            distance = abs(difference) if abs(difference) < self.stride else abs(difference) // self.stride
+            step = difference // distance
+            move = offsets.index(step) + 1
+            for cell in range(parent + step, index + step, step):
+                came[cell] = move
+            index = parent
@@ -1,82 +1,26 @@
 import sys
 
-class Node():
-    def __init__(self, state, parent, action):
-        self.state = state
-        self.parent = parent
-        self.action = action
+from contextlib import nullcontext
 
+from field import DistanceField
+from grid import MAZE_STRATEGIES, Grid, read_maze
+from render import render
+from search import Node, StackFrontier, QueueFrontier, search
 
-class StackFrontier():
-    def __init__(self):
-        self.frontier = []
-
-    def add(self, node):
-        self.frontier.append(node)
-
-    def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
-
-    def empty(self):
-        return len(self.frontier) == 0
-
-    def remove(self):
-        if self.empty():
-            raise Exception("empty frontier")
-        else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
-            return node
-
-
-class QueueFrontier(StackFrontier):
-
-    def remove(self):
-        if self.empty():
-            raise Exception("empty frontier")
-        else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
-            return node
 
 class Maze():
 
     def __init__(self, filename):
 
-        # Read file and set height and width of maze
-        with open(filename) as f:
-            contents = f.read()
-
-        # Validate start and goal
-        if contents.count("A") != 1:
-            raise Exception("maze must have exactly one start point")
-        if contents.count("B") != 1:
-            raise Exception("maze must have exactly one goal")
-
-        # Determine height and width of maze
-        contents = contents.splitlines()
-        self.height = len(contents)
-        self.width = max(len(line) for line in contents)
-
-        # Keep track of walls
-        self.walls = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                try:
-                    if contents[i][j] == "A":
-                        self.start = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == "B":
-                        self.goal = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == " ":
-                        row.append(False)
-                    else:
-                        row.append(True)
-                except IndexError:
-                    row.append(False)
-            self.walls.append(row)
+        # Read file, validating start and goal, and set height and width of maze
+        self.height, self.width, walls, self.start, self.goal = read_maze(filename)
+
+        # Keep track of walls, which read_maze stores with a border
+        stride = self.width + 2
+        self.walls = [
+            [wall == 1 for wall in walls[(i + 1) * stride + 1:(i + 2) * stride - 1]]
+            for i in range(self.height)
+        ]
 
         self.solution = None
 
@@ -116,114 +60,92 @@ class Maze():
         return result
 
 
-    def solve(self):
-        """Finds a solution to maze, if one exists."""
+    def heuristic(self, state):
+        """Manhattan distance from a cell to the goal."""
+        return abs(state[0] - self.goal[0]) + abs(state[1] - self.goal[1])
+
 
-        # Keep track of number of states explored
-        self.num_explored = 0
+    def solve(self, strategy="dfs", stats=None):
+        """Finds a solution to maze, if one exists.
 
-        # Initialize frontier to just the starting position
-        start = Node(state=self.start, parent=None, action=None)
-        frontier = StackFrontier()
-        frontier.add(start)
+        `strategy` is "dfs" (depth-first search), "bfs" (breadth-first
+        search, which finds a shortest path), "greedy" (greedy best-first
+        search by Manhattan distance to the goal) or "astar" (A* search by
+        Manhattan distance, which finds a shortest path exploring less) or
+        "jps" (jump point search, which finds a shortest path expanding
+        only the cells where a path may turn, far fewer in open areas).
 
-        # Initialize an empty explored set
+        Pass a search.SearchStats as `stats` to record nodes generated and
+        expanded, duplicates, peak frontier and explored sizes and search
+        time; for "jps", nodes are the jump points.
+        """
+        if strategy not in MAZE_STRATEGIES:
+            raise ValueError(f"unknown search strategy: {strategy}")
+        if strategy == "jps":
+            return self._solve_jump(stats)
+
+        # Search, keeping track of the states explored
         self.explored = set()
+        with stats.phase("search") if stats is not None else nullcontext():
+            node = search(self.start, lambda state: state == self.goal, self.neighbors, strategy,
+                          heuristic=self.heuristic, explored=self.explored, stats=stats)
+        if node is None:
+            raise Exception("no solution")
 
-        # Keep looping until solution found
-        while True:
-
-            # If nothing left in frontier, then no path
-            if frontier.empty():
-                raise Exception("no solution")
-
-            # Choose a node from the frontier
-            node = frontier.remove()
-            self.num_explored += 1
-
-            # If node is the goal, then we have a solution
-            if node.state == self.goal:
-                actions = []
-                cells = []
-                while node.parent is not None:
-                    actions.append(node.action)
-                    cells.append(node.state)
-                    node = node.parent
-                actions.reverse()
-                cells.reverse()
-                self.solution = (actions, cells)
-                return
-
-            # Mark node as explored
-            self.explored.add(node.state)
-
-            # Add neighbors to frontier
-            for action, state in self.neighbors(node.state):
-                if not frontier.contains_state(state) and state not in self.explored:
-                    child = Node(state=state, parent=node, action=action)
-                    frontier.add(child)
-
-
-    def output_image(self, filename, show_solution=True, show_explored=False):
-        from PIL import Image, ImageDraw
-        cell_size = 50
-        cell_border = 2
-
-        # Create a blank canvas
-        img = Image.new(
-            "RGBA",
-            (self.width * cell_size, self.height * cell_size),
-            "black"
-        )
-        draw = ImageDraw.Draw(img)
+        # Every explored state and the goal were removed from the frontier
+        self.num_explored = len(self.explored) + 1
+        self.solution = node.path()
 
-        solution = self.solution[1] if self.solution is not None else None
+
+    def _grid(self):
+        """Returns a Grid of the maze, its walls bordered as Grid keeps them."""
+        stride = self.width + 2
+        walls = bytearray(b"\x01") * ((self.height + 2) * stride)
         for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
+            walls[(i + 1) * stride + 1:(i + 2) * stride - 1] = bytes(row)
+        return Grid(self.height, self.width, walls, self.start, self.goal)
 
-                # Walls
-                if col:
-                    fill = (40, 40, 40)
 
-                # Start
-                elif (i, j) == self.start:
-                    fill = (255, 0, 0)
+    def distance_field(self):
+        """Returns the DistanceField of the maze: every cell's distance to the goal and next move."""
+        return DistanceField.build(self._grid())
 
-                # Goal
-                elif (i, j) == self.goal:
-                    fill = (0, 171, 28)
 
-                # Solution
-                elif solution is not None and show_solution and (i, j) in solution:
-                    fill = (220, 235, 113)
+    def _solve_jump(self, stats):
+        """Solves the maze by jump point search on a Grid of its walls."""
+        grid = self._grid()
+        grid.solve("jps", stats)
 
-                # Explored
-                elif solution is not None and show_explored and (i, j) in self.explored:
-                    fill = (212, 97, 85)
+        # Explored jump points, as cells
+        self.explored = set()
+        index = grid.explored.find(1)
+        while index != -1:
+            self.explored.add(grid.cell(index))
+            index = grid.explored.find(1, index + 1)
+        self.num_explored = grid.num_explored
+        self.solution = grid.solution
 
-                # Empty cell
-                else:
-                    fill = (237, 240, 252)
-
-                # Draw cell
-                draw.rectangle(
-                    ([(j * cell_size + cell_border, i * cell_size + cell_border),
-                      ((j + 1) * cell_size - cell_border, (i + 1) * cell_size - cell_border)]),
-                    fill=fill
-                )
-
-        img.save(filename)
-
-
-if len(sys.argv) != 2:
-    sys.exit("Usage: python maze.py maze.txt")
-
-m = Maze(sys.argv[1])
-print("Maze:")
-m.print()
-print("Solving...")
-m.solve()
-print("States Explored:", m.num_explored)
-print("Solution:")
-m.print()
-m.output_image("maze.png", show_explored=True)
+
+    def output_image(self, filename, show_solution=True, show_explored=False, cell_size=50, cell_border=2,
+                     downsample=1, tile=None):
+        """Draws the maze to an image file, see render.render for the options."""
+        return render(self, filename, show_solution, show_explored, cell_size, cell_border, downsample, tile)
+
+
+def main():
+    if len(sys.argv) not in (2, 3) or sys.argv[2:] and sys.argv[2] not in MAZE_STRATEGIES:
+        sys.exit(f"Usage: python maze.py maze.txt [{'|'.join(MAZE_STRATEGIES)}]")
+
+    m = Maze(sys.argv[1])
+    print("Maze:")
+    m.print()
+    print("Solving...")
+    m.solve(*sys.argv[2:])
+    print("States Explored:", m.num_explored)
+    print("Solution:")
+    m.print()
+    m.output_image("maze.png", show_explored=True)
+
+
+if __name__ == "__main__":
+    main()
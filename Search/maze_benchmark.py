@@ -0,0 +1,200 @@
+"""
+Benchmarks for maze solving.
+
+Solves mazes with every strategy, with Maze and with Grid, and records
+for each run the solve time (over --repeat solves, loading excluded),
+states explored, solution length and peak memory allocated while
+solving (measured with tracemalloc in a separate solve, so that tracing
+does not weigh on the timings).
+
+Mazes are the files given, or a suite written by maze_generate.py for
+each algorithm, size and seed. Results are written as JSON; with
+--baseline, mean times and states explored are compared against an
+earlier run to spot regressions. The strategies that find shortest paths
+must agree on their length, or a warning is printed.
+
+Usage: python maze_benchmark.py [mazes...] [--algorithms ...] [--sizes 51 201]
+                                [--seeds 0 1] [--strategies ...] [--backends maze grid]
+                                [--repeat N] [--output results.json] [--baseline results.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from grid import MAZE_STRATEGIES, Grid
+from maze import Maze
+from maze_batch import maze_files
+from maze_generate import ALGORITHMS, generate
+
+BACKENDS = ("maze", "grid")
+
+# Strategies that find shortest paths, whose lengths must agree
+SHORTEST = ("bfs", "astar", "jps")
+
+
+def suite(directory, algorithms, sizes, seeds, room=16, loops=0.0):
+    """
+    Writes a maze for each algorithm, size and seed to `directory`.
+    Returns a list of (filename, description) pairs.
+    """
+    mazes = []
+    for algorithm in algorithms:
+        for size in sizes:
+            for seed in seeds:
+                filename = os.path.join(directory, f"{algorithm}-{size}-{seed}.txt")
+                generate(filename, algorithm, size, size, seed, room, loops)
+                mazes.append((filename, {"algorithm": algorithm, "size": size, "seed": seed}))
+    return mazes
+
+
+def load(filename, backend):
+    return Grid.load(filename) if backend == "grid" else Maze(filename)
+
+
+def measure(filename, backend, strategy, repeat):
+    """
+    Solves one maze `repeat` times with a strategy and once more to trace
+    memory. Returns the result entry for the run.
+    """
+    maze = load(filename, backend)
+    result = {"backend": backend, "strategy": strategy, "solved": True, "length": None, "explored": None}
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            maze.solve(strategy)
+        except Exception:
+            result["solved"] = False
+        seconds.append(time.perf_counter() - start)
+    if result["solved"]:
+        result["length"] = len(maze.solution[0])
+        result["explored"] = maze.num_explored
+    result["seconds"] = {
+        "count": len(seconds),
+        "mean": sum(seconds) / len(seconds),
+        "min": min(seconds),
+        "max": max(seconds)
+    }
+
+    # Peak memory allocated by the solve, beyond the loaded maze
+    maze = load(filename, backend)
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        try:
+            maze.solve(strategy)
+        except Exception:
+            pass
+        result["peak_bytes"] = tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    return result
+
+
+def run(mazes, backends, strategies, repeat):
+    """
+    Benchmarks every maze, backend and strategy. Returns the list of
+    result entries.
+    """
+    results = []
+    for filename, description in mazes:
+        for backend in backends:
+            for strategy in strategies:
+                entry = {"maze": os.path.basename(filename), **description}
+                entry.update(measure(filename, backend, strategy, repeat))
+                results.append(entry)
+    return results
+
+
+def key(entry):
+    return entry["maze"], entry["backend"], entry["strategy"]
+
+
+def compare(results, baseline):
+    """
+    Yields (entry, baseline entry) for runs found in both.
+    """
+    earlier = {key(entry): entry for entry in baseline["results"]}
+    for entry in results:
+        if key(entry) in earlier:
+            yield entry, earlier[key(entry)]
+
+
+def report(results, baseline=None, out=sys.stderr):
+    for entry in results:
+        explored = "-" if entry["explored"] is None else entry["explored"]
+        length = "-" if entry["length"] is None else entry["length"]
+        print(f"{entry['maze']:<28} {entry['backend']:<5} {entry['strategy']:<7}"
+              f" mean {entry['seconds']['mean'] * 1000:10.3f} ms  explored {explored:<9}"
+              f" length {length:<7} peak {entry['peak_bytes'] / 1024:10.1f} KiB", file=out)
+
+    # Every backend and shortest-path strategy must find the same length
+    lengths = {}
+    for entry in results:
+        if entry["strategy"] in SHORTEST:
+            if lengths.setdefault(entry["maze"], entry["length"]) != entry["length"]:
+                print(f"warning: {entry['backend']} {entry['strategy']} disagrees on the length of "
+                      f"{entry['maze']}", file=out)
+
+    if baseline is not None:
+        print("compared to baseline:", file=out)
+        for entry, earlier in compare(results, baseline):
+            mean, before = entry["seconds"]["mean"], earlier["seconds"]["mean"]
+            change = (mean / before - 1) * 100 if before else 0.0
+            explored = ""
+            if entry["explored"] != earlier["explored"]:
+                explored = f"  explored {earlier['explored']} -> {entry['explored']}"
+            print(f"  {' '.join(key(entry)):<42} {change:+7.1f}%{explored}", file=out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark maze solving strategies.")
+    parser.add_argument("mazes", nargs="*", help="maze files or directories (default: a generated suite)")
+    parser.add_argument("--algorithms", nargs="+", choices=ALGORITHMS, default=list(ALGORITHMS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[51, 201],
+                        help="heights and widths of generated mazes")
+    parser.add_argument("--seeds", nargs="+", type=int, default=[0])
+    parser.add_argument("--loops", type=float, default=0.0,
+                        help="fraction of inner walls knocked down in generated mazes")
+    parser.add_argument("--strategies", nargs="+", choices=MAZE_STRATEGIES, default=list(MAZE_STRATEGIES))
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--repeat", type=int, default=3, help="timed solves per maze and strategy")
+    parser.add_argument("--output", default="-", help="JSON results (default: stdout)")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare with")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.mazes:
+            mazes = [(filename, {}) for filename in maze_files(args.mazes)]
+        else:
+            mazes = suite(directory, args.algorithms, args.sizes, args.seeds, loops=args.loops)
+        results = run(mazes, args.backends, args.strategies, max(args.repeat, 1))
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    report(results, baseline)
+
+    output = {
+        "repeat": args.repeat,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results
+    }
+    if args.output == "-":
+        json.dump(output, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(output, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Random mazes for maze.py, in its file format: # for walls, spaces for
+open cells, A for the start and B for the goal.
+
+Algorithms:
+
+    backtracker  recursive backtracker (randomized depth-first search): a
+                 perfect maze of long winding corridors
+    prim         randomized Prim's algorithm: a perfect maze of many short
+                 dead ends
+    rooms        open rooms of --room cells square, joined by doorways,
+                 with scattered pillars: mostly open space
+
+Perfect mazes have exactly one path between any two cells; --loops knocks
+down that fraction of the remaining inner walls to add more. Corridors
+and walls fall on odd and even rows and columns, so odd sizes fit best.
+The same arguments and seed always give the same maze.
+
+Usage: python maze_generate.py maze.txt [--algorithm backtracker|prim|rooms]
+                               [--height N] [--width N] [--seed S]
+"""
+
+import argparse
+import random
+
+ALGORITHMS = ("backtracker", "prim", "rooms")
+
+WALL = ord("#")
+OPEN = ord(" ")
+
+# Fraction of open room cells made pillars
+PILLARS = 0.02
+
+
+def generate(filename, algorithm="backtracker", height=51, width=51, seed=0, room=16, loops=0.0):
+    """
+    Writes a maze of `height` rows and `width` columns, borders included,
+    to `filename`.
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"unknown maze algorithm: {algorithm}")
+    if height < 3 or width < 3:
+        raise ValueError("mazes must be at least 3x3")
+    rng = random.Random(seed)
+    cells = bytearray([WALL]) * (height * width)
+    if algorithm == "backtracker":
+        backtracker(cells, height, width, rng)
+    elif algorithm == "prim":
+        prim(cells, height, width, rng)
+    else:
+        rooms(cells, height, width, rng, room)
+    if loops:
+        knock_down(cells, height, width, rng, loops)
+
+    # Start and goal on distinct open cells
+    open_cells = [index for index, cell in enumerate(cells) if cell == OPEN]
+    if len(open_cells) < 2:
+        raise ValueError("maze too small for a start and a goal")
+    start, goal = rng.sample(open_cells, 2)
+    cells[start] = ord("A")
+    cells[goal] = ord("B")
+
+    with open(filename, "wb") as f:
+        for row in range(height):
+            f.write(cells[row * width:(row + 1) * width])
+            f.write(b"\n")
+
+
+def lattice(height, width):
+    """
+    Returns the odd rows and columns that hold corridor cells.
+    """
+    return range(1, height - 1, 2), range(1, width - 1, 2)
+
+
+def carvable(cells, height, width, index):
+    """
+    Yields the (wall between, cell) pairs of the uncarved corridor cells
+    two steps from a cell.
+    """
+    row, column = divmod(index, width)
+    for row_step, column_step in ((-2, 0), (2, 0), (0, -2), (0, 2)):
+        if 0 < row + row_step < height - 1 and 0 < column + column_step < width - 1:
+            beyond = index + row_step * width + column_step
+            if cells[beyond] == WALL:
+                yield index + row_step // 2 * width + column_step // 2, beyond
+
+
+def backtracker(cells, height, width, rng):
+    rows, columns = lattice(height, width)
+    start = rng.choice(rows) * width + rng.choice(columns)
+    cells[start] = OPEN
+    stack = [start]
+    while stack:
+        choices = list(carvable(cells, height, width, stack[-1]))
+        if not choices:
+            stack.pop()
+            continue
+        wall, beyond = rng.choice(choices)
+        cells[wall] = OPEN
+        cells[beyond] = OPEN
+        stack.append(beyond)
+
+
+def prim(cells, height, width, rng):
+    rows, columns = lattice(height, width)
+    start = rng.choice(rows) * width + rng.choice(columns)
+    cells[start] = OPEN
+
+    # Walls between a cell in the maze and one not yet in it, as (wall,
+    # cell beyond) pairs; picked at random and removed by swapping
+    frontier = list(carvable(cells, height, width, start))
+    while frontier:
+        i = rng.randrange(len(frontier))
+        frontier[i], frontier[-1] = frontier[-1], frontier[i]
+        wall, beyond = frontier.pop()
+        if cells[beyond] == WALL:
+            cells[wall] = OPEN
+            cells[beyond] = OPEN
+            frontier.extend(carvable(cells, height, width, beyond))
+
+
+def rooms(cells, height, width, rng, room):
+    """
+    Open rooms separated by walls every `room` cells, with one doorway in
+    every wall between two rooms. Pillars stand on cells at even offsets
+    inside a room and never next to its walls, so they cannot cut any
+    cell off.
+    """
+    room = max(room, 2)
+    for row in range(1, height - 1):
+        for column in range(1, width - 1):
+            if not row % room or not column % room:
+                continue
+            inner = (row % room, column % room)
+            pillar = all(offset % 2 == 0 and 1 < offset < room - 1 for offset in inner)
+            if not pillar or rng.random() >= PILLARS:
+                cells[row * width + column] = OPEN
+
+    # Doorways through horizontal walls, then vertical ones
+    for wall_row in range(room, height - 1, room):
+        for first in range(1, width - 1, room):
+            column = rng.randint(first, min(first + room - 2, width - 2))
+            cells[wall_row * width + column] = OPEN
+    for wall_column in range(room, width - 1, room):
+        for first in range(1, height - 1, room):
+            row = rng.randint(first, min(first + room - 2, height - 2))
+            cells[row * width + wall_column] = OPEN
+
+
+def knock_down(cells, height, width, rng, fraction):
+    """
+    Opens `fraction` of the inner walls that separate two open cells.
+    """
+    for row in range(1, height - 1):
+        for column in range(1, width - 1):
+            index = row * width + column
+            if cells[index] != WALL or rng.random() >= fraction:
+                continue
+            if (cells[index - 1] == OPEN and cells[index + 1] == OPEN
+                    or cells[index - width] == OPEN and cells[index + width] == OPEN):
+                cells[index] = OPEN
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a random maze for maze.py.")
+    parser.add_argument("filename")
+    parser.add_argument("--algorithm", choices=ALGORITHMS, default="backtracker")
+    parser.add_argument("--height", type=int, default=51, help="rows, borders included")
+    parser.add_argument("--width", type=int, default=51, help="columns, borders included")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--room", type=int, default=16, help="room size for the rooms algorithm")
+    parser.add_argument("--loops", type=float, default=0.0,
+                        help="fraction of inner walls knocked down to add loops")
+    args = parser.parse_args()
+    generate(args.filename, args.algorithm, args.height, args.width, args.seed, args.room, args.loops)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+Search toolkit shared by the Search projects.
+
+Nodes, frontiers and a generic search driver:
+
+    Node             a search tree node; __slots__ keep millions of them small
+    StackFrontier    last in, first out (depth-first search)
+    QueueFrontier    first in, first out (breadth-first search)
+    PriorityFrontier lowest priority first, with decrease-key (greedy, A*)
+    SearchStats      counters, phase timings and a sampling hook for a search
+
+Every frontier keeps a hashed index of the states it holds, so
+contains_state is O(1), and add and remove are O(1) (O(log n) for the
+priority frontier).
+
+degrees/util.py re-exports this module, so the degrees project keeps
+importing its classes from util.
+"""
+
+import heapq
+import itertools
+import time
+
+from collections import deque
+from contextlib import contextmanager
+
+STRATEGIES = ("dfs", "bfs", "greedy", "astar")
+
+
+class Node():
+    __slots__ = ("state", "parent", "action", "cost")
+
+    def __init__(self, state, parent, action, cost=0):
+        self.state = state
+        self.parent = parent
+        self.action = action
+
+        # Cost of the path from the root to this node
+        self.cost = cost
+
+    def path(self):
+        """
+        Returns the (actions, states) lists leading from the root to this
+        node, excluding the root.
+        """
+        actions, states = [], []
+        node = self
+        while node.parent is not None:
+            actions.append(node.action)
+            states.append(node.state)
+            node = node.parent
+        actions.reverse()
+        states.reverse()
+        return actions, states
+
+
+class StackFrontier():
+    def __init__(self):
+        self.frontier = deque()
+
+        # Maps each state in the frontier to the number of nodes holding it,
+        # so that contains_state does not have to scan the frontier
+        self.states = {}
+
+    def add(self, node):
+        self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def contains_state(self, state):
+        return state in self.states
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def __len__(self):
+        return len(self.frontier)
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier.pop()
+            self._forget(node)
+            return node
+
+    def _forget(self, node):
+        count = self.states[node.state] - 1
+        if count:
+            self.states[node.state] = count
+        else:
+            del self.states[node.state]
+
+
+class QueueFrontier(StackFrontier):
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier.popleft()
+            self._forget(node)
+            return node
+
+
+class PriorityFrontier():
+    """
+    Frontier that removes the node with the lowest priority first, oldest
+    first among equal priorities. It holds at most one node per state:
+    adding a node for a state already in the frontier replaces it only if
+    the new priority is lower (decrease-key).
+
+    Priorities are given to add, or computed by `key(node)`, which
+    defaults to the node's path cost.
+    """
+
+    def __init__(self, key=None):
+        self.key = key if key is not None else (lambda node: node.cost)
+        self.heap = []
+
+        # Heap entry of each state in the frontier; replaced entries stay
+        # in the heap with their node set to None until they are popped
+        self.entries = {}
+        self.counter = itertools.count()
+
+    def add(self, node, priority=None):
+        """
+        Adds a node, returning False if its state is already in the
+        frontier with the same or a lower priority.
+        """
+        if priority is None:
+            priority = self.key(node)
+        entry = self.entries.get(node.state)
+        if entry is not None:
+            if entry[0] <= priority:
+                return False
+            entry[2] = None
+        entry = [priority, next(self.counter), node]
+        self.entries[node.state] = entry
+        heapq.heappush(self.heap, entry)
+        return True
+
+    def contains_state(self, state):
+        return state in self.entries
+
+    def priority(self, state):
+        """
+        Returns the priority of a state in the frontier, or None.
+        """
+        entry = self.entries.get(state)
+        return entry[0] if entry is not None else None
+
+    def empty(self):
+        return len(self.entries) == 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def remove(self):
+        while self.heap:
+            _, _, node = heapq.heappop(self.heap)
+            if node is not None:
+                del self.entries[node.state]
+                return node
+        raise Exception("empty frontier")
+
+
+class SearchStats():
+    """
+    Instrumentation for searches that are passed it as `stats`. Counters
+    add up over every search it is passed to:
+
+        generated      successor nodes added to the frontier
+        expanded       nodes removed from the frontier and expanded
+        duplicates     successors dropped because their state was already
+                       reached (or is filtered out of the search)
+        peak_frontier  largest frontier seen
+        peak_explored  largest number of states reached or explored
+        phases         seconds spent in each named phase
+
+    If `sample` is given, `sample(stats, frontier)` is called about every
+    `every` expansions (at most once per layer for searches that expand
+    whole layers at a time), to watch long searches as they run.
+    Searches without stats skip all of this.
+    """
+
+    __slots__ = (
+        "generated", "expanded", "duplicates", "peak_frontier", "peak_explored",
+        "phases", "sample", "every", "next_sample"
+    )
+
+    def __init__(self, sample=None, every=1000):
+        self.generated = 0
+        self.expanded = 0
+        self.duplicates = 0
+        self.peak_frontier = 0
+        self.peak_explored = 0
+        self.phases = {}
+        self.sample = sample
+        self.every = every
+        self.next_sample = every
+
+    def observe(self, frontier_size, explored_size, frontier=None):
+        """
+        Records the current frontier and explored sizes, and calls the
+        sampling hook if it is due.
+        """
+        if frontier_size > self.peak_frontier:
+            self.peak_frontier = frontier_size
+        if explored_size > self.peak_explored:
+            self.peak_explored = explored_size
+        if self.sample is not None and self.expanded >= self.next_sample:
+            self.next_sample = self.expanded + self.every
+            self.sample(self, frontier)
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Adds the wall time spent in the with block to phase `name`.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def as_dict(self):
+        return {
+            "generated": self.generated,
+            "expanded": self.expanded,
+            "duplicates": self.duplicates,
+            "peak_frontier": self.peak_frontier,
+            "peak_explored": self.peak_explored,
+            "phases": dict(self.phases)
+        }
+
+
+def search(start, goal_test, expand, strategy="bfs", heuristic=None, explored=None, stats=None):
+    """
+    Searches from the `start` state for a state passing `goal_test`,
+    where `expand(state)` gives the (action, state) pairs reachable from
+    a state in one step of cost 1. Returns the goal Node, or None if no
+    state passes the goal test.
+
+    `strategy` is "dfs", "bfs", "greedy" (best-first by `heuristic`) or
+    "astar" (by path cost plus `heuristic`, which should be consistent
+    for the path found to be shortest); `heuristic(state)` estimates the
+    cost from a state to the goal. States are goal tested when removed
+    from the frontier, and every state is expanded at most once. Expanded
+    states are added to `explored` if it is given, and the nodes searched
+    are counted in `stats` (a SearchStats) if it is given.
+    """
+    if strategy in ("greedy", "astar") and heuristic is None:
+        raise ValueError(f"{strategy} search needs a heuristic")
+    if explored is None:
+        explored = set()
+
+    root = Node(state=start, parent=None, action=None)
+    if strategy == "dfs":
+        frontier = StackFrontier()
+    elif strategy == "bfs":
+        frontier = QueueFrontier()
+    elif strategy == "greedy":
+        frontier = PriorityFrontier(lambda node: heuristic(node.state))
+    elif strategy == "astar":
+        frontier = PriorityFrontier(lambda node: (node.cost + heuristic(node.state), -node.cost))
+    else:
+        raise ValueError(f"unknown search strategy: {strategy}")
+    frontier.add(root)
+    decrease = strategy == "astar"
+
+    while not frontier.empty():
+        node = frontier.remove()
+        if goal_test(node.state):
+            return node
+        explored.add(node.state)
+
+        added = 0
+        successors = 0
+        for action, state in expand(node.state):
+            successors += 1
+            if state in explored:
+                continue
+
+            # A* may find a cheaper path to a state already in the frontier
+            if frontier.contains_state(state) and not decrease:
+                continue
+            if frontier.add(Node(state=state, parent=node, action=action, cost=node.cost + 1)) is not False:
+                added += 1
+
+        if stats is not None:
+            stats.expanded += 1
+            stats.generated += added
+            stats.duplicates += successors - added
+            stats.observe(len(frontier), len(explored), frontier)
+    return None
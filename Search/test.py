@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+
+from grid import ACTIONS, Grid
+from maze import Maze
+from maze_generate import generate
+
+MOVES = dict(zip(ACTIONS, ((-1, 0), (1, 0), (0, -1), (0, 1))))
+
+MAZES = {
+    "open": [
+        "##########",
+        "#A       #",
+        "#        #",
+        "#        #",
+        "#       B#",
+        "##########"
+    ],
+    "corridors": [
+        "###########",
+        "#A  #     #",
+        "### # ### #",
+        "#   #   # #",
+        "# ##### # #",
+        "#       #B#",
+        "###########"
+    ],
+    "pillars": [
+        "###########",
+        "#    #    #",
+        "# #  #  # #",
+        "#A #   #  #",
+        "#  ## ##  #",
+        "#    #   B#",
+        "###########"
+    ],
+    "adjacent": [
+        "####",
+        "#AB#",
+        "####"
+    ]
+}
+
+class Jump_Point_Search_Test(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.files = []
+        for name, rows in MAZES.items():
+            cls.files.append(os.path.join(cls.directory.name, f"{name}.txt"))
+            with open(cls.files[-1], "w") as f:
+                f.write("\n".join(rows) + "\n")
+        for algorithm in ("rooms", "backtracker"):
+            for seed in range(3):
+                cls.files.append(os.path.join(cls.directory.name, f"{algorithm}-{seed}.txt"))
+                generate(cls.files[-1], algorithm, 31, 41, seed, room=8, loops=0.2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def assertValidSolution(self, maze):
+        actions, cells = maze.solution
+        self.assertEqual(len(actions), len(cells))
+        row, column = maze.start
+        for action, cell in zip(actions, cells):
+            step = MOVES[action]
+            row, column = row + step[0], column + step[1]
+            self.assertEqual(cell, (row, column))
+            self.assertTrue(0 <= row < maze.height and 0 <= column < maze.width)
+            self.assertFalse(maze.walls[row][column] if isinstance(maze, Maze) else maze.is_wall(cell))
+        self.assertEqual((row, column), maze.goal)
+
+    # Shortest Path Tests
+    def test_maze_jps_matches_bfs(self):
+        for filename in self.files:
+            expected = Maze(filename)
+            expected.solve("bfs")
+            maze = Maze(filename)
+            maze.solve("jps")
+            self.assertEqual(len(maze.solution[0]), len(expected.solution[0]), filename)
+            self.assertValidSolution(maze)
+
+    def test_grid_jps_matches_bfs(self):
+        for filename in self.files:
+            expected = Grid.load(filename)
+            expected.solve("bfs")
+            grid = Grid.load(filename)
+            grid.solve("jps")
+            self.assertEqual(len(grid.solution[0]), len(expected.solution[0]), filename)
+            self.assertValidSolution(grid)
+
+    def test_no_solution(self):
+        filename = os.path.join(self.directory.name, "walled.txt")
+        with open(filename, "w") as f:
+            f.write("#######\n#A # B#\n#######\n")
+        for maze in (Maze(filename), Grid.load(filename)):
+            with self.assertRaises(Exception):
+                maze.solve("jps")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -11,5 +11,57 @@ class Tictactoe_Test(unittest.TestCase):
             [EMPTY, EMPTY, EMPTY],
             [EMPTY, EMPTY, EMPTY]], X))
 
+    # Transposition Table Tests
+    values = {}
+
+    def value(self, board):
+        key = board_key(board)
+        if key not in self.values:
+            if terminal(board):
+                self.values[key] = utility(board)
+            else:
+                values = [self.value(result(board, action)) for action in actions(board)]
+                self.values[key] = max(values) if player(board) == X else min(values)
+        return self.values[key]
+
+    def positions(self):
+        boards, seen = [initial_state()], set()
+        while boards:
+            board = boards.pop()
+            if board_key(board) in seen:
+                continue
+            seen.add(board_key(board))
+            yield board
+            if not terminal(board):
+                boards.extend(result(board, action) for action in actions(board))
+
+    def test_table_keeps_values_exact(self):
+        shared = TranspositionTable()
+        for board in self.positions():
+            if terminal(board):
+                continue
+            search = max_value if player(board) == X else min_value
+            expected = self.value(board)
+            self.assertEqual(search(board, TranspositionTable())[0], expected)
+            value, move = search(board, shared)
+            self.assertEqual(value, expected)
+            self.assertEqual(self.value(result(board, move)), expected)
+
+    def test_table_size_cap(self):
+        table = TranspositionTable(size=10)
+        board = initial_state()
+        while not terminal(board):
+            board = result(board, minimax(board, table))
+            self.assertLessEqual(len(table), 10)
+        self.assertIsNone(winner(board))
+
+    def test_table_persists_across_calls(self):
+        table = TranspositionTable()
+        minimax(initial_state(), table)
+        self.assertGreater(len(table), 0)
+        hits = table.hits
+        minimax(result(initial_state(), (1, 1)), table)
+        self.assertGreater(table.hits, hits)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -5,6 +5,8 @@ Tic Tac Toe Player
 import math
 import copy
 
+from collections import OrderedDict
+
 from util import vertical_check, horizontal_check, diagonal_check, all_spots_filled
 
 from matplotlib.axis import XAxis
@@ -92,55 +94,161 @@ def utility(board):
     return -1 if w == O else 0
 
 
-def minimax(board):
+# Transposition table entries bound the true value from below or above
+# when the search of their position was cut off by pruning
+EXACT, LOWER, UPPER = "exact", "lower", "upper"
+
+# Positions kept in the transposition table by default; tic-tac-toe only
+# has 5,478 legal positions, so the default never evicts
+TABLE_SIZE = 100000
+
+
+class TranspositionTable():
+    """
+    Values of positions already searched, keyed by board_key(board), as
+    (value, best move, flag) entries where flag is EXACT, LOWER or UPPER.
+    Once more than `size` positions are stored, the least recently used
+    are evicted.
+    """
+
+    def __init__(self, size=TABLE_SIZE):
+        self.size = size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def store(self, key, value, move, flag):
+        self.entries[key] = (value, move, flag)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = self.misses = 0
+
+
+# Shared by every call to minimax that is not given a table of its own,
+# so that later moves of a game reuse the positions searched for earlier
+# ones; set its size to cap it
+transpositions = TranspositionTable()
+
+
+def board_key(board):
+    """
+    Returns a hashable encoding of the board.
+    """
+    return tuple(cell for row in board for cell in row)
+
+
+def minimax(board, table=None):
     """
     Returns the optimal action for the current player on the board.
     """
     if terminal(board):
         return None
+    if table is None:
+        table = transpositions
     
     if player(board) == X:
-        value, move = max_value(board)
+        value, move = max_value(board, table)
     else:
-        value, move = min_value(board)
+        value, move = min_value(board, table)
     return move
 
 
-def min_value(board):
-    if terminal(board): 
-        return utility(board), None
+def probe(board, table, alpha, beta):
+    """
+    Returns (key, entry, cutoff) for a board: its table key and entry,
+    and the (value, move) to return right away if the entry settles the
+    search within the window (alpha, beta), or None.
+    """
+    key = board_key(board)
+    entry = table.lookup(key)
+    if entry is not None:
+        value, move, flag = entry
+        if flag == EXACT or flag == LOWER and value >= beta or flag == UPPER and value <= alpha:
+            return key, entry, (value, move)
+    return key, entry, None
 
-    else:
-        v = 999
-        best_action = None
 
-        for action in actions(board):
-            value, move = max_value(result(board, action))
+def ordered_actions(board, entry):
+    """
+    Returns the actions on the board, with the best move found by an
+    earlier search first.
+    """
+    moves = actions(board)
+    if entry is not None and entry[1] in moves:
+        moves.remove(entry[1])
+        moves.insert(0, entry[1])
+    return moves
 
-            if value < v:
-                v = value
-                best_action = action
-                if v == -1:
-                    return v, best_action
-        return v, best_action
 
-def max_value(board):
+def min_value(board, table=None, alpha=-math.inf, beta=math.inf):
     if terminal(board): 
         return utility(board), None
-
-    else:
-        v = -999
-        best_action = None
-
-        for action in actions(board):
-            value, move = min_value(result(board, action))
-
-            if value > v:
-                v = value
-                best_action = action
-                if v == 1:
-                    return v, best_action
-        return v, best_action
+    if table is None:
+        table = transpositions
+
+    key, entry, cutoff = probe(board, table, alpha, beta)
+    if cutoff is not None:
+        return cutoff
+
+    v = math.inf
+    best_action = None
+    original_beta = beta
+    for action in ordered_actions(board, entry):
+        value, move = max_value(result(board, action), table, alpha, beta)
+
+        if value < v:
+            v = value
+            best_action = action
+            beta = min(beta, v)
+            if v == -1 or v <= alpha:
+                break
+
+    flag = UPPER if v <= alpha else LOWER if v >= original_beta else EXACT
+    table.store(key, v, best_action, flag)
+    return v, best_action
+
+def max_value(board, table=None, alpha=-math.inf, beta=math.inf):
+    if terminal(board): 
+        return utility(board), None
+    if table is None:
+        table = transpositions
+
+    key, entry, cutoff = probe(board, table, alpha, beta)
+    if cutoff is not None:
+        return cutoff
+
+    v = -math.inf
+    best_action = None
+    original_alpha = alpha
+    for action in ordered_actions(board, entry):
+        value, move = min_value(result(board, action), table, alpha, beta)
+
+        if value > v:
+            v = value
+            best_action = action
+            alpha = max(alpha, v)
+            if v == 1 or v >= beta:
+                break
+
+    flag = LOWER if v >= beta else UPPER if v <= original_alpha else EXACT
+    table.store(key, v, best_action, flag)
+    return v, best_action
 
 print(minimax([[EMPTY, X, O],
             [O, X, X],